@@ -13,54 +13,72 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from pathlib import Path
-from math import pi
+from time import perf_counter
 
-import FreeCAD
+# time-to-first-paint is counted from here
+STARTED = perf_counter()
+
+import hashlib  # noqa: E402
+import sys  # noqa: E402
+from contextlib import nullcontext  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import FreeCAD  # noqa: E402
 # import FreeCADGui
 
-from PySide import QtCore, QtWidgets, QtUiTools
+from PySide import QtCore, QtWidgets  # noqa: E402
 
-QUiLoader = QtUiTools.QUiLoader
-QFile = QtCore.QFile
-Qt = QtCore.Qt
+# once per session: every run of the macro executes this again
+MACRO_DIR = str(Path(__file__).parent)
+if MACRO_DIR not in sys.path:
+    sys.path.insert(0, MACRO_DIR)
+
+from LVarset_core import (  # noqa: E402
+    VARSET_NAME, BindingIndex, CandidateStore, SearchIndex, build_plan,
+    get_scan_cache, iter_apply_plan, plan_steps, set_profiler, sync_plan)
 
+# True: after binding recompute the whole document, not only the objects
+# bound and what depends on them
+FULL_RECOMPUTE = False
 
-if FreeCAD.ActiveDocument is None:
-    QtWidgets.QMessageBox.critical(
-        None, "LVarset",
-        "No active document.\nPlease open or create a document first.")
+# None: every property goes into LVarset; "body": one VarSet per top-level
+# Body/Part (LVarset_Body...); a number: VarSets LVarset, LVarset001...
+# holding at most that many properties each
+SHARDING = None
 
-d = FreeCAD.ActiveDocument
+# False: Compile binds the checked properties only. True: sync mode,
+# Compile checks every existing binding too and writes the properties,
+# values and expressions that differ (see sync_plan); it re-points the
+# expressions removed by hand and removes the VarSet properties left
+# bound to nothing
+SYNC = False
 
+# None: no profiling; "timing": phase times, scan cost per TypeId, FreeCAD
+# calls and slowest objects; "cprofile": the same plus a cProfile capture.
+# The report is printed to the console when the window closes and saved
+# as JSON to PROFILE_FILE (LVarset_profile.json in the temp folder if None)
+PROFILE = None
+PROFILE_FILE = None
 
-NotAllowedObjects = [
-    'ActiveView', 'AdditiveLoft', 'AdditivePipe', 'ArcFitTolerance',
-    'DocumentObjectGroup', 'DrawLeaderLine', 'DrawPage', 'DrawRichAnno',
-    'DrawSVGTemplate', 'DrawViewImage', 'DrawViewAnnotation', 'Line', 'Origin',
-    'Part', 'Plane', 'Sheet'
-]
+# seconds of work per slice of the scan and of the binding, between two
+# slices the GUI repaints and reacts
+SLICE_BUDGET = 0.03
 
-AllowedProperties = [
-    'Angle', 'Angle1', 'ActiveView', 'Angle2', 'Angle3', 'AttachmentOffset',
-    'Constraints', 'CustomThreadClearance', 'Depth', 'Diameter',
-    'DrillPointAngle', 'FirstAngle', 'Height', 'HoleCutCountersinkAngle',
-    'HoleCutDepth', 'HoleCutDiameter', 'Length', 'Length2', 'LengthFwd',
-    'LengthRev', 'Occurrences', 'Offset', 'Pad', 'Placement', 'Radius',
-    'Radius1', 'Radius2', 'Radius3', 'SecondAngle', 'Size', 'Size2',
-    'TaperAngle', 'TaperAngleRev', 'TaperAngle2', 'TaperedAngle',
-    'ThreadDepth', 'ThreadDiameter', 'ThreadDirection', 'Value', 'Width',
-    'x', 'y', 'z'
-]
+# objectName of the window, found again when the macro is run once more
+WINDOW_NAME = "LVarsetWindow"
+
+Qt = QtCore.Qt
 
 
 # **************************************************
 # *******  CREDITS AND CREATION OF LVarsets  *******
 # **************************************************
 
-if FreeCAD.ActiveDocument.getObject("LVarset"):
-    LVarset = FreeCAD.ActiveDocument.getObject("LVarset")
-else:
+def GetLVarset(d):
+    """Returns the LVarset of d, showing the credits and creating it
+    the first time the macro runs on the document"""
+    if d.getObject(VARSET_NAME):
+        return d.getObject(VARSET_NAME)
     msgBox = QtWidgets.QMessageBox()
     msgBox.setText(''''
 **************************************************************************
@@ -79,127 +97,214 @@ else:
 # the property of the author.''')
 
     msgBox.setStandardButtons(QtWidgets.QMessageBox.Ok)
-    ret = msgBox.exec()
-    LVarset = FreeCAD.ActiveDocument.addObject('App::VarSet', 'LVarset')
+    msgBox.exec()
+    return d.addObject('App::VarSet', VARSET_NAME)
+
+
+# ------------------------------------------------
+#                    UI FORM
+# ------------------------------------------------
+
+
+def UiDigest(ui_path):
+    """sha1 of the UI file, line ends as \\n; None if it is missing"""
+    try:
+        data = ui_path.read_bytes()
+    except OSError:
+        return None
+    return hashlib.sha1(data.replace(b"\r\n", b"\n")).hexdigest()
+
+
+def LoadForm(parent):
+    """Returns the form of LVarset.ui as a child of parent.
+
+    LVarset_ui, the form compiled to Python, is used when it has been
+    compiled from the LVarset.ui there is; otherwise (edited in the
+    Designer and not compiled again) the XML is loaded through QUiLoader,
+    which is much slower.
+    """
+    ui_path = Path(__file__).parent / "LVarset.ui"
+    try:
+        import LVarset_ui
+    except ImportError:
+        LVarset_ui = None
+    if LVarset_ui is not None:
+        Digest = UiDigest(ui_path)
+        if Digest is None or Digest == LVarset_ui.UI_SHA1:
+            form = QtWidgets.QWidget(parent)
+            LVarset_ui.Ui_Form().setupUi(form)
+            return form
+        print("LVarset_ui.py is older than LVarset.ui, loading the XML\n")
+
+    from PySide import QtUiTools  # only needed here
+
+    if not ui_path.exists():
+        raise FileNotFoundError(f"UI file not found: {ui_path}")
+    ui_file = QtCore.QFile(str(ui_path))
+
+    if not ui_file.open(QtCore.QFile.ReadOnly):
+        raise RuntimeError("Cannot open UI file")
+
+    loader = QtUiTools.QUiLoader()
+    form = loader.load(ui_file, parent)
+    ui_file.close()
+
+    if form is None:
+        raise RuntimeError("Failed to load UI file")
+    return form
+
+
+def FindWindow():
+    """Returns the window left by an earlier run of the macro, if any"""
+    for widget in QtWidgets.QApplication.topLevelWidgets():
+        if widget.objectName() == WINDOW_NAME:
+            return widget
+    return None
 
 
 # ------------------------------------------------
-#              OBJECT DATA EXTRACTION
+#              CLASS PropertyListModel
 # ------------------------------------------------
-# at the end Objects will contain all the permitted objects in the drawing
-# that have at least one property still to be inserted in the LVarset Objects
-
-Object = []
-Objects = []
-NOgg = len(FreeCAD.ActiveDocument.Objects)
-Counter = 0
-
-for x in range(NOgg):  # cycle through all objects
-    XObject = d.Objects[x]
-    type_name = XObject.TypeId.split("::")[-1]
-    if type_name in NotAllowedObjects:
-        continue  # if it is a not allowed object, ignore it
-
-    for i in range(len(XObject.PropertiesList)):
-        # cycle through all properties of that object
-        Property = XObject.PropertiesList[i]
-        if Property not in AllowedProperties:
-            continue
-        if 'ReadOnly' in XObject.getPropertyStatus(XObject.PropertiesList[i]):
-            continue  # cannot be modified, skip to next
-        if Property == "AttachmentOffset":  # if the property is an AttOff
-            if not f"{XObject.Name}AttOff" in LVarset.PropertiesList:
-                Object.append(["AttOff", XObject.AttachmentOffset.Matrix, 0])
-                Counter += 1
-                continue
-        elif Property == "Placement":  # if the property is an Placement
-
-            if not f"{XObject.Name}PlacementPosX" in LVarset.PropertiesList:
-                # if there is NO Property with that name in the LVarset
-                Object.append(
-                    [f"{XObject.Name}Placement", XObject.Placement.Base, 0])
-                Counter += 1
-                continue
-            # if the property is neither a constraint nor an AttOff
-
-        elif Property == 'Constraints':  # if the property is a constraint
-            for ii in range(XObject.ConstraintCount):
-                try:
-                    # check if it's modifiable data or, for example,
-                    # ConstraintCoincident
-                    XObject.getDatum(ii)
-                except:
-                    # It is a constraint but not modifiable, e.g.
-                    # ConstraintCoincident. Move on to the next property.
-                    continue
-                try:
-                    XObject.Constraints[ii].Driven
-                except:
-                    # ok property modifiable
-                    pass
-                else:
-                    # it's a constraint, it's writable data, but it's blocked,
-                    # move on to another property
-                    continue
-                Data = str(XObject.getDatum(ii))
-                x = Data.find(" ")
-                Data = Data[:x]  # removes space and unit
-                if XObject.Constraints[ii].Name:
-                    if f"{XObject.Name}{XObject.Constraints[ii].Name}" not in LVarset.PropertiesList:
-                        # no property, adding to object
-                        Object.append([f"{XObject.Constraints[ii].Name}", Data, 0])
-                        Counter += 1  # a Property has been added
-                elif f"{XObject.Name}{XObject.Constraints[ii]}" not in LVarset.PropertiesList:
-                    # non in varset add to object
-                    Object.append([f"Constraint{ii+1}", Data, 0])
-                    Counter += 1
+
+
+class PropertyListModel(QtCore.QAbstractListModel):
+    """The properties of one object of a CandidateStore.
+
+    Nothing is allocated per item: the text is built when the view asks
+    for it and the check state is the Store selection itself.
+    """
+
+    def __init__(self, Store, parent=None):
+        super().__init__(parent)
+        self.Store = Store
+        self.Rows = []  # Store rows of the object shown
+        self.Width = 30
+
+    def setObject(self, Name, Rows=None):
+        """Shows the properties of the object Name (None: nothing), or only
+        its Rows if given"""
+        self.beginResetModel()
+        if Rows is not None:
+            self.Rows = Rows
         else:
-            if f"{XObject.Name}{Property}" not in LVarset.PropertiesList:
-                # if Property is not already in VarSet
-                Data = str(getattr(XObject, Property))
-                x = Data.find(" ")
-                if x > 0:
-                    Data = Data[:x]  # delete space and Unit
-                    Object.append([Property, Data, 0])
-                    Counter += 1
-    if Counter:  # if any Properties have been added to Object
-        Object.insert(0, ["Name", XObject.Name, 0])
-        Object.insert(
-            0,
-            ["Label",
-             XObject.Label.replace("-", "").replace("+", "").replace(".", ""),
-             0])
-        Counter = 0  # add Data=‘’
-        Objects.append(Object)
-    Object = []
-    Counter = 0
-
-print("creation of Objects ok\n")
+            self.Rows = self.Store.rows(Name) if Name is not None else []
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.Rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.Rows[index.row()]
+        if role == Qt.DisplayRole:
+            candidate = self.Store.candidates[row]
+            return (f"{candidate.name}".ljust(self.Width, " ")
+                    + f" = {candidate.display_value()}")
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if self.Store.is_selected(row) else Qt.Unchecked
+        return None
+
+    def flags(self, index):
+        return (Qt.ItemIsEnabled | Qt.ItemIsSelectable
+                | Qt.ItemIsUserCheckable)
+
+    def setData(self, index, value, role=Qt.CheckStateRole):
+        if role != Qt.CheckStateRole or not index.isValid():
+            return False
+        self.Store.set_selected(
+            self.Rows[index.row()], Qt.CheckState(value) == Qt.Checked)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def setAllChecked(self, flag):
+        """Checks or unchecks every property, with a single dataChanged"""
+        if not self.Rows:
+            return
+        self.Store.select_rows(self.Rows, flag)
+        self.dataChanged.emit(
+            self.index(0), self.index(len(self.Rows) - 1),
+            [Qt.CheckStateRole])
 
 
 # ------------------------------------------------
-#                   CLASS Window1
+#                CLASS ChunkedRunner
 # ------------------------------------------------
 
 
-class Window1(QtWidgets.QWidget):
-    def __init__(self):
-        super().__init__()
-        ui_path = Path(__file__).parent / "LVarset.ui"
+class ChunkedRunner(QtCore.QObject):
+    """Drives a generator from the Qt event loop, a time slice per tick.
+
+    The FreeCAD API is not thread safe, so long jobs run in the GUI thread
+    Budget seconds at a time; between two slices Qt repaints and handles
+    the input, the Cancel button among it. OnChunk receives the items
+    produced in a slice, OnDone the outcome ("done", "cancelled" or
+    "failed") and the exception, if any.
+    """
+
+    def __init__(self, Steps, OnChunk, OnDone, Budget=SLICE_BUDGET,
+                 parent=None):
+        super().__init__(parent)
+        self.Steps = Steps
+        self.OnChunk = OnChunk
+        self.OnDone = OnDone
+        self.Budget = Budget
+        self.Timer = QtCore.QTimer(self)
+        self.Timer.setInterval(0)
+        self.Timer.timeout.connect(self.Tick)
+
+    def start(self):
+        self.Timer.start()
+
+    def running(self):
+        return self.Timer.isActive()
+
+    def cancel(self):
+        """Stops the job; the generator is closed so it can clean up"""
+        if self.running():
+            self.Timer.stop()
+            Status, Error = "cancelled", None
+            try:
+                self.Steps.close()
+            except Exception as e:
+                # the clean up failed: still reported, so that the window
+                # is unlocked
+                Status, Error = "failed", e
+            finally:
+                self.OnDone(Status, Error)
+
+    def Tick(self):
+        Items = []
+        Status = Error = None
+        End = perf_counter() + self.Budget
+        try:
+            while True:
+                Items.append(next(self.Steps))
+                if perf_counter() >= End:
+                    break
+        except StopIteration:
+            Status = "done"
+        except Exception as e:
+            Status, Error = "failed", e
+        if Items:
+            self.OnChunk(Items)
+        if Status is not None:
+            self.Timer.stop()
+            self.OnDone(Status, Error)
 
-        if not ui_path.exists():
-            raise FileNotFoundError(f"UI file not found: {ui_path}")
-        ui_file = QtCore.QFile(str(ui_path))
 
-        if not ui_file.open(QtCore.QFile.ReadOnly):
-            raise RuntimeError("Cannot open UI file")
+# ------------------------------------------------
+#                   CLASS Window1
+# ------------------------------------------------
 
-        loader = QtUiTools.QUiLoader()
-        self.ui = loader.load(ui_file, self)
-        ui_file.close()
 
-        if self.ui is None:
-            raise RuntimeError("Failed to load UI file")
+class Window1(QtWidgets.QWidget):
+    def __init__(self, d, LVarset, Cache, Profiler=None):
+        super().__init__()
+        self.Profiler = Profiler  # LVarset_profile.Profiler or None
+        self.setObjectName(WINDOW_NAME)
+        with self.Phase("ui.load"):
+            self.ui = LoadForm(self)
 
         self.ui.setSizePolicy(
             QtWidgets.QSizePolicy.Expanding,
@@ -210,8 +315,22 @@ class Window1(QtWidgets.QWidget):
         layout.setContentsMargins(10, 10, 10, 10)
         layout.setSpacing(0)
 
-        self.XOggetti = []
+        self.d = d
+        self.LVarset = LVarset
+        self.Cache = Cache  # ScanCache of d
+        self.Index = Cache.index  # VarSetIndex (or ShardedIndex) of LVarset
+        self.Store = CandidateStore()  # filled by the scan
+        self.Runner = None  # ChunkedRunner of the scan or of the binding
+        self.ObjectNames = []  # object Name of every ComboBox entry
+        self.Search = None  # SearchIndex of Store, built by FillForm
+        self.Filter = None  # {object Name: Rows} matching the filter
+        self.Model = PropertyListModel(self.Store, self)
         self.NOgg = 0
+        self.Started = STARTED  # start of the launch
+        self.FirstPaint = None  # seconds from Started to the first paint
+        self.PaintPending = False  # the scan starts after the first paint
+        self.Reselect = set()  # keys checked before a new scan
+        self.Closing = False  # True inside closeEvent
 
         # ----------------------------------------
         #                  WIDGET
@@ -219,13 +338,20 @@ class Window1(QtWidgets.QWidget):
 
         # se Property NON e' gia' presente nel varset
         self.OBjectsLabel = self.ui.findChild(QtWidgets.QLabel, "OBjectsLabel")
+        self.FilterEdit = self.ui.findChild(QtWidgets.QLineEdit, "FilterEdit")
         self.ObjComb = self.ui.findChild(QtWidgets.QComboBox, "ObjCombo")
         self.DeSelAl = self.ui.findChild(QtWidgets.QPushButton, "DeSelAll")
         self.SelAl = self.ui.findChild(QtWidgets.QPushButton, "SelAll")
         self.PropertiesLabel = self.ui.findChild(QtWidgets.QLabel, "PropertiesLabel")
-        self.ListProperties = self.ui.findChild(QtWidgets.QListWidget, "ListProperties")
+        self.ListProperties = self.ui.findChild(QtWidgets.QListView, "ListProperties")
+        self.ListProperties.setUniformItemSizes(True)
+        self.ListProperties.setModel(self.Model)
         self.CompileVar = self.ui.findChild(QtWidgets.QPushButton, "CompileVars")
         self.Exi = self.ui.findChild(QtWidgets.QPushButton, "Exit")
+        self.Progress = self.ui.findChild(QtWidgets.QProgressBar, "Progress")
+        self.Canc = self.ui.findChild(QtWidgets.QPushButton, "Cancel")
+        self.Progress.hide()
+        self.Canc.hide()
 
         # ----------------------------------------
         #                  EVENTS
@@ -236,6 +362,159 @@ class Window1(QtWidgets.QWidget):
         self.Exi.clicked.connect(self.Exit)
         self.CompileVar.clicked.connect(self.CompileVars)
         self.ObjComb.currentIndexChanged.connect(lambda: self.UpdatePropList())
+        self.FilterEdit.textChanged.connect(self.FilterChanged)
+        self.Canc.clicked.connect(self.CancelJob)
+
+    # --------------------------------------------
+    #                    LAUNCH
+    # --------------------------------------------
+
+    def Reusable(self, d, LVarset):
+        """True if this window can serve a new run of the macro on d"""
+        return d is self.d and LVarset is self.LVarset
+
+    def UseCache(self, Cache):
+        """Makes the window work on Cache, the ScanCache of this run: the
+        one of the last run may have been dropped since, e.g. when a shard
+        was deleted, or made with another SHARDING"""
+        if Cache is not self.Cache and self.Runner is None:
+            self.Cache = Cache
+            self.Index = Cache.index
+
+    def Launch(self, Started=None, Profiler=None):
+        """Shows the window; the scan is left to after the first paint"""
+        self.Started = perf_counter() if Started is None else Started
+        if Profiler is not None:
+            self.Profiler = Profiler
+        self.PaintPending = True
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.PaintPending:
+            self.PaintPending = False
+            self.FirstPaint = perf_counter() - self.Started
+            if self.Profiler is not None:
+                self.Profiler.add("startup.first_paint", self.FirstPaint)
+            QtCore.QTimer.singleShot(0, self.AfterShow)
+
+    def AfterShow(self):
+        """The heavy part of the launch, once the window is on screen"""
+        if self.Runner is None:
+            self.StartScan()
+
+    def ResetStore(self):
+        """Empties Store, ComboBox and list, keeping the checked keys in
+        Reselect for the scan to come"""
+        Store = self.Store
+        self.Reselect = {Store.candidates[row].key
+                         for row in Store.selected()}
+        self.Store = self.Model.Store = CandidateStore()
+        self.ObjectNames = []
+        self.Search = None
+        self.Filter = None
+        self.Model.setObject(None)
+        self.ObjComb.blockSignals(True)
+        self.ObjComb.clear()
+        self.ObjComb.blockSignals(False)
+        self.NOgg = 0
+
+    # --------------------------------------------
+    #                 SCAN AND JOBS
+    # --------------------------------------------
+
+    def StartJob(self, Steps, Total, OnChunk, OnDone):
+        """Runs Steps a slice at a time, showing the progress bar"""
+        self.Progress.setRange(0, max(Total, 1))
+        self.Progress.setValue(0)
+        self.Progress.show()
+        self.Canc.show()
+
+        def Done(Status, Error):
+            self.Progress.hide()
+            self.Canc.hide()
+            self.Runner = None
+            OnDone(Status, Error)
+
+        self.Runner = ChunkedRunner(Steps, OnChunk, Done, parent=self)
+        self.Runner.start()
+
+    def CancelJob(self):
+        if self.Runner is not None:
+            self.Runner.cancel()
+
+    def Phase(self, Name):
+        """Times the block as the phase Name when profiling"""
+        if self.Profiler is None:
+            return nullcontext()
+        return self.Profiler.phase(Name)
+
+    def Begin(self, Name):
+        if self.Profiler is not None:
+            self.Profiler.begin(Name)
+
+    def End(self, Name):
+        if self.Profiler is not None:
+            self.Profiler.end(Name)
+
+    def ReportProfile(self):
+        """Prints the profile to the console and saves it as JSON"""
+        if self.Profiler is None:
+            return
+        import tempfile
+
+        self.Profiler.stop()
+        data = self.Profiler.report()
+        self.Profiler.print_report(data)
+        path = PROFILE_FILE or str(
+            Path(tempfile.gettempdir()) / "LVarset_profile.json")
+        self.Profiler.save(path, data)
+        print(f"LVarset profile saved to {path}\n")
+        set_profiler(None)
+        self.Profiler = None
+
+    def StartScan(self):
+        """Scans the document a slice at a time: the objects found are
+        selectable as soon as they arrive. Run again, only the objects
+        changed in the meantime are scanned (see ScanCache)"""
+        if self.Store:
+            self.ResetStore()
+        self.Begin("scan")
+        self.StartJob(self.Cache.iter_candidates(), len(self.d.Objects),
+                      self.ScanChunk, self.ScanDone)
+
+    def ScanChunk(self, Items):
+        """Adds the objects of a slice of the scan to Store and ComboBox"""
+        Names = []
+        for Name, Candidates in Items:
+            if Candidates:
+                self.Store.extend(Candidates)
+                Names.append(Name)
+        self.Progress.setValue(self.Progress.value() + len(Items))
+        if Names and not self.FilterEdit.text():
+            # the filter is applied at the end of the scan
+            with self.Phase("scan.combo"):
+                self.ObjectNames.extend(Names)
+                self.ObjComb.addItems(
+                    [f"{self.Store.labels[Name]}--{Name}" for Name in Names])
+
+    def ScanDone(self, Status, Error):
+        self.End("scan")
+        for key in self.Reselect:
+            row = self.Store.find(*key)
+            if row >= 0:
+                self.Store.set_selected(row, True)
+        self.Reselect = set()
+        if Status == "failed":
+            QtWidgets.QMessageBox.critical(
+                self, "LVarset", f"Scan of the document failed:\n{Error}")
+        elif Status == "cancelled":
+            print("scan of the document cancelled\n")
+        else:
+            print("creation of Objects ok\n")
         self.FillForm()
 
     # --------------------------------------------
@@ -243,230 +522,208 @@ class Window1(QtWidgets.QWidget):
     # --------------------------------------------
 
     def FillForm(self):
-        """Fills the ComboBox with the names of all Objects in Object
-         and the list with all the properties of the first Object of Objects.
-
-         sets self.NOgg to 0 (first Object in the list)"""
-
-        # Fill ComboBox
-        for Object in Objects:
-            self.ObjComb.addItem(f"{Object[0][1]}--{Object[1][1]}")
-            self.NOgg = 0
-
-        # Fill QListWidget
-        XObject = Objects[self.NOgg]
-        self.ListProperties.clear()
-        for x, y, z in XObject[2:]:
-            # Property starting from the third (excluding Name and Label)
-            xitem = QtWidgets.QListWidgetItem(
-                str(f"{x}".ljust(13, " ") + f" = {y}"))
-            self.ListProperties.addItem(xitem)
-            xitem.setFlags(xitem.flags() | QtCore.Qt.ItemIsUserCheckable)
-            xitem.setCheckState(Qt.Unchecked)
+        """Builds the search index of Store, fills the ComboBox with the
+         names of the Objects in Store and the list with all the properties
+         of the first Object."""
+
+        with self.Phase("fill"):
+            self.Search = SearchIndex(self.Store)
+            self.Filter = self.Search.search(self.FilterEdit.text())
+            self.FillCombo()
+
+    def FillCombo(self):
+        """Fills the ComboBox with the Objects passing the filter and the
+        list with the properties of the first one (or of the Object shown
+        before, if it passes the filter)"""
+        Store = self.Store
+        if 0 <= self.NOgg < len(self.ObjectNames):
+            Current = self.ObjectNames[self.NOgg]
+        else:
+            Current = None
+        if self.Filter is None:
+            self.ObjectNames = Store.objects()
+        else:
+            self.ObjectNames = list(self.Filter)
+        self.ObjComb.blockSignals(True)
+        self.ObjComb.clear()
+        self.ObjComb.addItems(
+            [f"{Store.labels[Name]}--{Name}" for Name in self.ObjectNames])
+        if Current in self.ObjectNames:
+            self.ObjComb.setCurrentIndex(self.ObjectNames.index(Current))
+        self.ObjComb.blockSignals(False)
+
+        # Fill the list
+        self.UpdatePropList()
+
+    def FilterChanged(self, Text):
+        """Narrows the ComboBox and the list to what matches Text"""
+        if self.Search is None:
+            return
+        self.Filter = self.Search.search(Text)
+        self.FillCombo()
 
     def DeselectAll(self):
-        for i in range(self.ListProperties.count()):
-            item = self.ListProperties.item(i)
-            item.setCheckState(Qt.Unchecked)
+        self.Model.setAllChecked(False)
 
     def SelectAll(self):
-        for i in range(self.ListProperties.count()):
-            item = self.ListProperties.item(i)
-            item.setCheckState(Qt.Checked)
+        self.Model.setAllChecked(True)
 
     def Exit(self):
+        # only hidden: the next run of the macro shows it again
         self.close()
-        self.deleteLater()
+
+    def closeEvent(self, event):
+        # a binding left half done would keep its transaction open
+        self.Closing = True
+        self.CancelJob()
+        self.Closing = False
+        self.ReportProfile()
+        super().closeEvent(event)
 
     def UpdatePropList(self):
-        """Cycles through the Properties of XObject in the list and if they are
-        checked, checks them to 1 in Objects, then clears the list and
-        repopulates it with Properties of the current Object in the ComboBox
-        """
-
-        # self.NOgg is the index of the previous object
-        for i in range(self.ListProperties.count()):
-            item = self.ListProperties.item(i)
-            if item.checkState() == Qt.Checked:
-                Objects[self.NOgg][i+2][2] = 1  # flags the Property' of Objects
-            else:
-                pass
-        # clears and writes the properties of the current Object
-        self.ListProperties.clear()
+        """Shows in the list the Properties of the current Object in the
+        ComboBox; their check state is already in the Store"""
         self.NOgg = self.ObjComb.currentIndex()  # remember the current object
-
-        for x, y, z in Objects[self.NOgg][2:]:
-            # Property starting from the third (excluding Name and Label
-            if z == 0:
-                xitem = QtWidgets.QListWidgetItem(
-                    str(f"{x}".ljust(30, " ") + f" = {y}"))
-                self.ListProperties.addItem(xitem)
-                xitem.setFlags(xitem.flags() | QtCore.Qt.ItemIsUserCheckable)
-                xitem.setCheckState(Qt.Unchecked)
-            elif z == 1:
-                xitem = QtWidgets.QListWidgetItem(
-                    str(f"{x}".ljust(30, " ") + f" = {y}"))
-                self.ListProperties.addItem(xitem)
-                xitem.setFlags(xitem.flags() | QtCore.Qt.ItemIsUserCheckable)
-                xitem.setCheckState(Qt.Checked)
+        with self.Phase("list"):
+            if 0 <= self.NOgg < len(self.ObjectNames):
+                Name = self.ObjectNames[self.NOgg]
+                Rows = self.Filter.get(Name) \
+                    if self.Filter is not None else None
+                self.Model.setObject(Name, Rows)
             else:
-                print("******  ERROR   ******\n")
-                pass
-
-    a = 3
-    d.recompute()
+                self.Model.setObject(None)
 
     # --------------------------------------------
     #                    LVarset
     # --------------------------------------------
 
     def CompileVars(self):
-        self.UpdatePropList()
-        c = 0
-        for XObject in reversed(Objects):
-            GroupName = XObject[0][1].replace("-", "").replace("+", "").replace(".", "")
-            x = 0  # to check if there are any Properties left to import
-            for Property in XObject[2:]:  # e.g. [‘Height’, ‘10.0 ’, 0]
-                if Property[2] == 1:  # = flagged
-                    # writes Property, in the Varset
-
-                    if "AttOff" in Property[0]:
-                        # Check if it is an AttachmentOffset
-                        obj11af = d.getObject(XObject[1][1]).AttachmentOffset
-                        Angle = obj11af.Rotation.Angle * 180 / pi
-                        LVarset.addProperty(
-                            'App::PropertyAngle', f'{XObject[1][1]}AttOffAngle',
-                            GroupName)
-                        setattr(LVarset, f'{XObject[1][1]}AttOffAngle', Angle)
-
-                        PosX = obj11af.Base.x
-                        PosY = obj11af.Base.y
-                        PosZ = obj11af.Base.z
-
-                        for i, ii in (
-                                (PosX, f'{XObject[1][1]}AttOffPosX'),
-                                (PosY, f'{XObject[1][1]}AttOffPosY'),
-                                (PosZ, f'{XObject[1][1]}AttOffPosZ')):
-                            PropertyName = ii
-                            LVarset.addProperty(
-                                'App::PropertyFloat', PropertyName, GroupName)
-                            setattr(LVarset, PropertyName, i)
-                        c += 1
-
-                    elif "Placement" in Property[0]: # Check if it is a Placement
-                        obj11pl = d.getObject(XObject[1][1]).Placement
-                        Angle = obj11pl.Rotation.Angle * 180 / pi
-                        LVarset.addProperty(
-                            'App::PropertyAngle', f'{XObject[1][1]}PlacementAngle',
-                            GroupName)
-                        setattr(LVarset, f'{XObject[1][1]}PlacementAngle', Angle)
-
-                        PosX = obj11pl.Base.x
-                        PosY = obj11pl.Base.y
-                        PosZ = obj11pl.Base.z
-
-                        for i, ii in (
-                                (PosX, f'{XObject[1][1]}PlacementPosX'),
-                                (PosY, f'{XObject[1][1]}PlacementPosY'),
-                                (PosZ, f'{XObject[1][1]}PlacementPosZ')):
-                            PropertyName = ii
-                            LVarset.addProperty(
-                                'App::PropertyFloat', PropertyName , GroupName)
-                            setattr(LVarset, PropertyName, i)
-                        c += 1
-                    else:  # Others
-                        PropertyName = f'{XObject[1][1]}{Property[0]}'
-                        LVarset.addProperty(
-                            'App::PropertyFloat', PropertyName, GroupName)
-                        setattr(LVarset, PropertyName, float(Property[1]))
-                        c += 1
-
-                    # writes Formula in Object
-
-                    ogg = d.getObject(XObject[1][1])  # e.g. ‘Sketch001’
-                    if "AttOff" in Property[0]:  # Check if it is an AttachmentOffset
-
-                        for i, ii in (
-                                ('AttachmentOffset.Rotation.Angle',
-                                 f'LVarset.{XObject[1][1]}AttOffAngle'),
-                                ('AttachmentOffset.Base.x',
-                                 f'LVarset.{XObject[1][1]}AttOffPosX'),
-                                ('AttachmentOffset.Base.y',
-                                 f'LVarset.{XObject[1][1]}AttOffPosY'),
-                                ('AttachmentOffset.Base.z',
-                                 f'LVarset.{XObject[1][1]}AttOffPosZ')):
-                            ogg.setExpression(i, ii)
-                            b = 0
-
-                    elif "Placement" in Property[0]:  # Check if it is an Placement
-
-                        for i, ii in (
-                                ('Placement.Rotation.Angle',
-                                 f'LVarset.{XObject[1][1]}PlacementAngle'),
-                                ('Placement.Base.x',
-                                 f'LVarset.{XObject[1][1]}PlacementPosX'),
-                                ('Placement.Base.y',
-                                 f'LVarset.{XObject[1][1]}PlacementPosY'),
-                                ('Placement.Base.z',
-                                 f'LVarset.{XObject[1][1]}PlacementPosZ')):
-                            ogg.setExpression(i, ii)
-                            b = 0  # NOTE: Is this used!!!
-
-                    else:
-                        try:  # check if it is a modifiable constraint
-                            ogg.getDatum(Property[0])
-                            if "Constraint" in Property[0]:
-                                # e.g. ‘Constraint6’ try to see if the constraint
-                                # does not have a name
-                                aa = f"Constraints[{int(Property[0][10:])-1}]"
-                                Expression = f'LVarset.{XObject[1][1]}{Property[0]}'
-
-                                ogg.setExpression(aa, Expression)
-                                # e.g. <Sketcher::SketchObject>.setExpression(
-                                # Constraint[6], ‘LVarset.   Sketch_Constraint6’)
-                            else:
-                                # if there is not Constraint in the name
-                                # then it's a constraint with a name' like
-                                # es. 'BoxLenght'
-                                aa = f"Constraints[{ogg.getIndexByName(Property[0])}]"
-                                Expression = f'LVarset.{XObject[1][1]}{Property[0]}'
-                                ogg.setExpression(aa, Expression)
-                        except Exception as e:
-                            # if it is not a Constraint(Datum) then it is
-                            # a Property' type e.g. Value or Occurrence
-                            Expression = f'LVarset.{XObject[1][1]}{Property[0]}'
-                            ogg.setExpression(Property[0], Expression)
-                            # es. <Sketcher::SketchObject>.setExpression(
-                            # Largh, 'LVarset.Sketch_Largh')
-
-                    # removes Property from Objects so that it is no longer listed
-                    Objects[Objects.index(XObject)].remove(Property)
-                else:
-                    # otherwise remember not to delete the entire XObject
-                    x = 1
-
-            if x == 0:
-                # If there are no more Properties, remove XObject from Objects
-                Objects.remove(XObject)
-            c = 3
-        # self.NObject = 0
-        d.recompute()
-        # self.ListProperties.clear()
-        XObject = []
-        self.XObjects = []
-
-        self.ListProperties.clear()
+        """Binds the flagged Properties to LVarset as a single undo step,
+        a slice at a time"""
+        if self.Runner is not None:
+            return  # scan still running
+        Store = self.Store
+        Rows = Store.selected()
+        # e.g. LVarset.Sketch001Constraint7 and the Formula
+        # <Sketcher::SketchObject>.setExpression(
+        # Constraints[6], 'LVarset.Sketch001Constraint7')
+        with self.Phase("bind.plan"):
+            Candidates = [Store.candidates[row] for row in Rows]
+            Bindings = BindingIndex.load(self.d, self.LVarset)
+            if SYNC:
+                # the bindings already there are checked too, and only
+                # what differs is written
+                Candidates.extend(self.Cache.bound_candidates())
+                plan = sync_plan(self.d, self.Index, Candidates, Bindings)
+            else:
+                plan = build_plan(Candidates, self.Index)
+        if not plan:
+            if SYNC:
+                print("LVarset already in sync, nothing to write\n")
+            return
+        Steps = iter_apply_plan(
+            self.d, self.Index, plan, full_recompute=FULL_RECOMPUTE,
+            bindings=Bindings)
+
+        def Chunk(Items):
+            self.Progress.setValue(Items[-1])
+
+        def Done(Status, Error):
+            self.End("bind")
+            self.SetBusy(False)
+            if Status == "failed":
+                QtWidgets.QMessageBox.critical(
+                    self, "LVarset",
+                    f"Binding failed, nothing has been changed:\n{Error}")
+            elif Status == "cancelled":
+                print("binding cancelled, nothing has been changed\n")
+            else:
+                self.CompileDone(Rows)
+
+        self.SetBusy(True)
+        self.Begin("bind")
+        self.StartJob(Steps, plan_steps(plan), Chunk, Done)
+
+    def SetBusy(self, Busy):
+        """Locks the form while the binding runs, Cancel excepted, and the
+        rest of FreeCAD too: the window is application modal meanwhile, so
+        no edit of the user lands in the open transaction while recomputes
+        are frozen"""
+        for widget in (self.FilterEdit, self.ObjComb, self.SelAl,
+                       self.DeSelAl, self.ListProperties, self.CompileVar):
+            widget.setEnabled(not Busy)
+        Modality = Qt.ApplicationModal if Busy else Qt.NonModal
+        if self.windowModality() != Modality:
+            # Qt applies the modality when the window is shown
+            Shown = self.isVisible() and not self.Closing
+            self.hide()
+            self.setWindowModality(Modality)
+            if Shown:
+                self.show()
+
+    def CompileDone(self, Rows):
+        # removes the bound Properties from Store so that they are no
+        # longer listed
+        self.Store.remove_rows(Rows)
+
+        self.ObjectNames = []
+        self.Search = None
+        self.Filter = None
+        self.Model.setObject(None)
         self.ObjComb.clear()
         self.NOgg = -1
 
+
 # ------------------------------------------------
 #                  code execution
 # ------------------------------------------------
 
 
-Window1 = Window1()
-screen = Window1.screen().availableGeometry()
-x = screen.x() + (screen.width() - Window1.width()) // 3
-y = screen.y() + (screen.height() - Window1.height()) // 5
-Window1.move(x, y)
-Window1.show()
+def main(Started=None):
+    """Shows the LVarset window of the active document: the one of an
+    earlier run if it is still there, refreshed, or a new one. Started is
+    the time the launch began, for the time-to-first-paint."""
+    d = FreeCAD.ActiveDocument
+    if d is None:
+        QtWidgets.QMessageBox.critical(
+            None, "LVarset",
+            "No active document.\nPlease open or create a document first.")
+        return None
+
+    LVarset = GetLVarset(d)
+    profiler = None
+    if PROFILE:
+        from LVarset_profile import Profiler
+
+        profiler = Profiler(cprofile=PROFILE == "cprofile")
+        profiler.meta = {"document": d.Name, "objects": len(d.Objects),
+                         "sharding": SHARDING, "sync": SYNC}
+        set_profiler(profiler)
+        profiler.start()
+
+    window = FindWindow()
+    if window is not None and not (
+            hasattr(window, "Reusable") and window.Reusable(d, LVarset)):
+        # another document, or left by another version of the macro
+        window.close()
+        window.deleteLater()
+        window = None
+
+    # kept between two runs of the macro: only the objects changed in
+    # the meantime are scanned again
+    Cache = get_scan_cache(d, LVarset, sharding=SHARDING)
+    if window is not None:
+        window.UseCache(Cache)
+    else:
+        with profiler.phase("window") if profiler else nullcontext():
+            window = Window1(d, LVarset, Cache, profiler)
+            screen = window.screen().availableGeometry()
+            x = screen.x() + (screen.width() - window.width()) // 3
+            y = screen.y() + (screen.height() - window.height()) // 5
+            window.move(x, y)
+    window.Launch(Started, profiler)
+    return window
+
+
+if __name__ == "__main__":
+    LVarsetWindow = main(STARTED)
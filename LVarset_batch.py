@@ -0,0 +1,318 @@
+# LVarset_batch Copyright (c) 2025 Luca Corti
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Binds the LVarset of many .FCStd files without the GUI.
+
+The checkboxes of the macro are replaced by a rule file (JSON):
+
+    {"rules": [
+        {"type": "PartDesign::Pad", "property": "Length"},
+        {"type": "Sketcher::SketchObject", "constraint": "Box*"},
+        {"object": "Body*", "kind": "Placement"}
+    ]}
+
+every rule is a set of glob patterns, all of which must match:
+    type        TypeId of the object
+    object      Name or Label of the object
+    kind        AttOff, Placement, Constraint or Property
+    property    name of a property, as in the property editor
+                (AttachmentOffset and Placement included)
+    constraint  name of a constraint (ConstraintN for the unnamed ones)
+a candidate is bound if any rule matches it.
+
+usage:
+    FreeCADCmd LVarset_batch.py --pass rules.json parts/ [-j 8] [-o out/]
+    python LVarset_batch.py rules.json parts/   (FreeCAD lib in PYTHONPATH)
+
+the files are spread over a multiprocessing pool (-j, default all the
+cores) and a report line is printed per file; --report writes them all
+as JSON. Under FreeCADCmd sys.executable is FreeCAD and not a Python
+interpreter: the workers are forked where fork exists, and on Windows
+spawned with the Python bundled next to FreeCADCmd. Without either, the
+files are bound one after the other, as with -j 1.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from fnmatch import translate
+from multiprocessing import get_all_start_methods, get_context
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from LVarset_core import (  # noqa: E402
+    KIND_ATTOFF, KIND_CONSTRAINT, KIND_PLACEMENT, BindingIndex, apply_plan,
+    build_plan, get_varset, make_index, scan_document, sync_plan)
+
+RULE_FIELDS = ("type", "object", "kind", "property", "constraint")
+
+# names of the Python bundled next to FreeCADCmd, see pool_context
+BUNDLED_PYTHONS = ("python.exe", "python3", "python")
+
+# FreeCAD property of the placement kinds, whose candidate name is the kind
+PLACEMENT_PROPERTIES = {KIND_ATTOFF: "AttachmentOffset",
+                        KIND_PLACEMENT: "Placement"}
+
+
+# ------------------------------------------------
+#                  SELECTION RULES
+# ------------------------------------------------
+
+
+class Rule:
+    """One rule of the rule file, its patterns compiled once"""
+
+    __slots__ = RULE_FIELDS
+
+    def __init__(self, spec):
+        unknown = set(spec) - set(RULE_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown rule field(s): {sorted(unknown)}")
+        for field in RULE_FIELDS:
+            pattern = spec.get(field)
+            setattr(self, field,
+                    re.compile(translate(pattern)) if pattern else None)
+
+    def match(self, candidate, type_id):
+        if self.type and not self.type.match(type_id):
+            return False
+        if self.object and not (self.object.match(candidate.object_name)
+                                or self.object.match(candidate.label)):
+            return False
+        if self.kind and not self.kind.match(candidate.kind):
+            return False
+        is_constraint = candidate.kind == KIND_CONSTRAINT
+        if self.property and (is_constraint or not (
+                self.property.match(candidate.name) or self.property.match(
+                    PLACEMENT_PROPERTIES.get(candidate.kind, "")))):
+            return False
+        if self.constraint and (not is_constraint
+                                or not self.constraint.match(candidate.name)):
+            return False
+        return True
+
+
+class RuleSet:
+    """The rules of a rule file"""
+
+    def __init__(self, specs):
+        self.rules = [Rule(spec) for spec in specs]
+        if not self.rules:
+            raise ValueError("the rule file has no rules")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["rules"] if isinstance(data, dict) else data)
+
+    def select(self, doc, candidates):
+        """Yields the candidates matched by at least one rule"""
+        type_ids = {}
+        for candidate in candidates:
+            type_id = type_ids.get(candidate.object_name)
+            if type_id is None:
+                type_id = type_ids[candidate.object_name] = \
+                    doc.getObject(candidate.object_name).TypeId
+            if any(rule.match(candidate, type_id) for rule in self.rules):
+                yield candidate
+
+
+# ------------------------------------------------
+#                    ONE FILE
+# ------------------------------------------------
+
+
+def bind_file(path, rules, output_dir=None, dry_run=False, sharding=None,
+              sync=False):
+    """Opens path, binds what rules select and saves it (into output_dir
+    if given). sharding is passed to make_index. With sync the bindings
+    already there are matched against the rules too and only what differs
+    is written, a file in sync is not even saved. Returns the report of
+    the file, errors included."""
+    import FreeCAD
+
+    report = {"file": str(path), "status": "ok", "candidates": 0,
+              "bound": 0, "properties": 0, "values": 0, "expressions": 0,
+              "removed": 0, "seconds": 0.0, "error": None}
+    start = perf_counter()
+    doc = None
+    try:
+        doc = FreeCAD.openDocument(str(path))
+        varset = get_varset(doc, create=False)
+        index = make_index(doc, varset, sharding)
+        candidates = list(scan_document(doc, varset, index,
+                                        include_bound=sync))
+        report["candidates"] = len(candidates)
+        bindings = BindingIndex.load(doc, varset) \
+            if sync and varset is not None else None
+        if bindings is not None:
+            plan = sync_plan(doc, index, rules.select(doc, candidates),
+                             bindings)
+        else:
+            plan = build_plan(rules.select(doc, candidates), index)
+        report["bound"] = len(plan)
+        report["properties"] = len(plan.properties)
+        report["values"] = len(plan.values)
+        report["expressions"] = len(plan.expressions)
+        report["removed"] = len(plan.obsolete)
+        if plan and not dry_run:
+            if varset is None:
+                varset = get_varset(doc)
+                index = make_index(doc, varset, sharding)
+                plan = build_plan(plan.candidates, index)
+            if bindings is None:
+                bindings = BindingIndex.load(doc, varset)
+            apply_plan(doc, index, plan, bindings=bindings)
+            if output_dir is not None:
+                doc.saveAs(str(Path(output_dir) / Path(path).name))
+            else:
+                doc.save()
+        elif not plan:
+            report["status"] = "in sync" if sync else "nothing to bind"
+    except Exception as e:
+        report["status"] = "failed"
+        report["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if doc is not None:
+            FreeCAD.closeDocument(doc.Name)
+    report["seconds"] = round(perf_counter() - start, 3)
+    return report
+
+
+def _bind_file(args):
+    return bind_file(*args)
+
+
+# ------------------------------------------------
+#                  MANY FILES
+# ------------------------------------------------
+
+
+def find_files(paths):
+    """Returns the .FCStd files of paths (files or directories)"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.FCStd")))
+        else:
+            files.append(path)
+    return files
+
+
+def bind_files(files, rules, jobs=None, output_dir=None, dry_run=False,
+               sharding=None, sync=False):
+    """Yields the report of every file as soon as it is done.
+
+    jobs is the number of worker processes (all the cores if None); with
+    one job, or when no worker can be started (see pool_context),
+    everything runs in this process.
+    """
+    tasks = [(path, rules, output_dir, dry_run, sharding, sync)
+             for path in files]
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks) or 1)
+    context = pool_context() if jobs > 1 else None
+    if context is None:
+        if jobs > 1:
+            print("no Python to start the workers: the files are bound "
+                  "in this process",
+                  file=sys.stderr)
+        yield from map(_bind_file, tasks)
+        return
+    # every worker opens its own documents: nothing FreeCAD crosses the
+    # process boundary but the paths, the rules and the reports
+    with context.Pool(jobs, maxtasksperchild=50) as pool:
+        yield from pool.imap_unordered(_bind_file, tasks)
+
+
+def pool_context():
+    """Returns the multiprocessing context of the workers, None if they
+    cannot be started.
+
+    spawn starts sys.executable, which under FreeCADCmd is FreeCAD and not
+    a Python interpreter: fork is used where it exists, otherwise spawn
+    with the Python found next to sys.executable (the bin folder of
+    FreeCAD on Windows). The workers get the sys.path of this process, so
+    they import FreeCAD from the same place.
+    """
+    if "fork" in get_all_start_methods():
+        return get_context("fork")
+    context = get_context("spawn")
+    executable = Path(sys.executable)
+    if executable.name.lower().startswith("python"):
+        return context
+    for name in BUNDLED_PYTHONS:
+        python = executable.with_name(name)
+        if python.is_file():
+            context.set_executable(str(python))
+            return context
+    return None
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+        if "--pass" in argv:  # FreeCADCmd script.py --pass args
+            argv = argv[argv.index("--pass") + 1:]
+    parser = argparse.ArgumentParser(
+        prog="LVarset_batch", description=__doc__.splitlines()[0])
+    parser.add_argument("rules", help="JSON rule file")
+    parser.add_argument("paths", nargs="+", help=".FCStd files or folders")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: all the cores)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="save into this folder instead of in place")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="report what would be bound, save nothing")
+    parser.add_argument("--shard", default=None,
+                        help='spread the bindings over several VarSets: '
+                             '"body" (one per Body/Part) or a maximum '
+                             'number of properties per VarSet')
+    parser.add_argument("--sync", action="store_true",
+                        help="check the existing bindings too and write "
+                             "only what differs")
+    parser.add_argument("--report", default=None,
+                        help="write the reports to this JSON file")
+    args = parser.parse_args(argv)
+
+    rules = RuleSet.load(args.rules)
+    files = find_files(args.paths)
+    if args.output:
+        Path(args.output).mkdir(parents=True, exist_ok=True)
+
+    reports = []
+    start = perf_counter()
+    for report in bind_files(files, rules, args.jobs, args.output,
+                             args.dry_run, args.shard, args.sync):
+        reports.append(report)
+        print(f"{report['status']:16} {report['bound']:5} bound "
+              f"{report['seconds']:8.2f}s  {report['file']}"
+              + (f"  {report['error']}" if report["error"] else ""))
+    failed = sum(report["status"] == "failed" for report in reports)
+    print(f"{len(reports)} files, {failed} failed, "
+          f"{perf_counter() - start:.1f}s")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1672 @@
+# LVarset_core Copyright (c) 2025 Luca Corti
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Headless part of the LVarset macro.
+
+Nothing in here imports Qt or touches FreeCAD.ActiveDocument: every function
+receives the document and the VarSet it works on, so the scan can be run from
+scripts, FreeCADCmd or against a stub FreeCAD module.
+"""
+
+import json
+import re
+from bisect import bisect_right
+from contextlib import contextmanager, nullcontext
+from itertools import compress
+from math import degrees
+
+
+NotAllowedObjects = frozenset([
+    'ActiveView', 'AdditiveLoft', 'AdditivePipe', 'ArcFitTolerance',
+    'DocumentObjectGroup', 'DrawLeaderLine', 'DrawPage', 'DrawRichAnno',
+    'DrawSVGTemplate', 'DrawViewImage', 'DrawViewAnnotation', 'Line', 'Origin',
+    'Part', 'Plane', 'Sheet'
+])
+
+AllowedProperties = frozenset([
+    'Angle', 'Angle1', 'ActiveView', 'Angle2', 'Angle3', 'AttachmentOffset',
+    'Constraints', 'CustomThreadClearance', 'Depth', 'Diameter',
+    'DrillPointAngle', 'FirstAngle', 'Height', 'HoleCutCountersinkAngle',
+    'HoleCutDepth', 'HoleCutDiameter', 'Length', 'Length2', 'LengthFwd',
+    'LengthRev', 'Occurrences', 'Offset', 'Pad', 'Placement', 'Radius',
+    'Radius1', 'Radius2', 'Radius3', 'SecondAngle', 'Size', 'Size2',
+    'TaperAngle', 'TaperAngleRev', 'TaperAngle2', 'TaperedAngle',
+    'ThreadDepth', 'ThreadDiameter', 'ThreadDirection', 'Value', 'Width',
+    'x', 'y', 'z'
+])
+
+VARSET_NAME = "LVarset"
+
+# kinds of candidate
+KIND_ATTOFF = "AttOff"
+KIND_PLACEMENT = "Placement"
+KIND_CONSTRAINT = "Constraint"
+KIND_PROPERTY = "Property"
+
+PLACEMENT_KINDS = (KIND_ATTOFF, KIND_PLACEMENT)
+
+# kinds of property value, see PropertySchema
+VALUE_QUANTITY = "Quantity"
+VALUE_PLACEMENT = "Placement"
+VALUE_CONSTRAINTS = "Constraints"
+VALUE_FLOAT = "Float"
+
+FLOAT_PROPERTY_TYPES = frozenset((
+    'App::PropertyFloat', 'App::PropertyFloatConstraint',
+    'App::PropertyPrecision'
+))
+
+
+def clean_label(label):
+    """Removes the characters that are not allowed in a VarSet group name"""
+    return label.replace("-", "").replace("+", "").replace(".", "")
+
+
+# ------------------------------------------------
+#                CANDIDATE RECORD
+# ------------------------------------------------
+
+
+class Candidate:
+    """A property of a document object that can be bound to the VarSet.
+
+    kind is one of KIND_ATTOFF, KIND_PLACEMENT, KIND_CONSTRAINT or
+    KIND_PROPERTY; name is the name shown in the list and used to build the
+    VarSet property name; index is the constraint index (-1 otherwise).
+    value is a float, or the tuple (angle, x, y, z) for the placement kinds.
+    """
+
+    __slots__ = ("object_name", "label", "kind", "name", "value", "index")
+
+    def __init__(self, object_name, label, kind, name, value, index=-1):
+        self.object_name = object_name
+        self.label = label
+        self.kind = kind
+        self.name = name
+        self.value = value
+        self.index = index
+
+    def __repr__(self):
+        return (f"Candidate({self.object_name!r}, {self.kind!r}, "
+                f"{self.name!r}, {self.value!r})")
+
+    @property
+    def key(self):
+        """(object name, candidate name), unique inside a scan"""
+        return (self.object_name, self.name)
+
+    def varset_names(self):
+        """Names of the VarSet properties this candidate is bound to"""
+        if self.kind in PLACEMENT_KINDS:
+            prefix = f"{self.object_name}{self.kind}"
+            return (f"{prefix}Angle", f"{prefix}PosX",
+                    f"{prefix}PosY", f"{prefix}PosZ")
+        return (f"{self.object_name}{self.name}",)
+
+    def bound_name(self):
+        """VarSet property whose presence means 'already bound'"""
+        if self.kind in PLACEMENT_KINDS:
+            return f"{self.object_name}{self.kind}PosX"
+        return f"{self.object_name}{self.name}"
+
+    def display_value(self):
+        if self.kind in PLACEMENT_KINDS:
+            angle, x, y, z = self.value
+            return f"({x}, {y}, {z}) {angle}°"
+        return f"{self.value}"
+
+
+def binding_expressions(candidate, varset_name=VARSET_NAME):
+    """Returns the (path, expression) pairs binding candidate to the VarSet
+    named varset_name"""
+    Names = candidate.varset_names()
+    if candidate.kind in PLACEMENT_KINDS:
+        Root = ("AttachmentOffset" if candidate.kind == KIND_ATTOFF
+                else "Placement")
+        Paths = (f"{Root}.Rotation.Angle", f"{Root}.Base.x",
+                 f"{Root}.Base.y", f"{Root}.Base.z")
+    elif candidate.kind == KIND_CONSTRAINT:
+        Paths = (f"Constraints[{candidate.index}]",)
+    else:  # a Property' type e.g. Value or Occurrence
+        Paths = (candidate.name,)
+    return [(Path, f"{varset_name}.{Name}")
+            for Path, Name in zip(Paths, Names)]
+
+
+def placement_values(placement):
+    """Returns (angle in degrees, x, y, z) of a FreeCAD Placement"""
+    base = placement.Base
+    return (degrees(placement.Rotation.Angle), base.x, base.y, base.z)
+
+
+def quantity_value(value):
+    """Returns the float of a Quantity, None if value has no unit"""
+    data = str(value)
+    x = data.find(" ")
+    if x <= 0:
+        return None
+    try:
+        return float(getattr(value, "Value", data[:x]))
+    except (TypeError, ValueError):
+        return None  # not a number, e.g. "Vector (1.0, 2.0, 3.0)"
+
+
+# ------------------------------------------------
+#               VARSET PROPERTY INDEX
+# ------------------------------------------------
+
+
+def get_varset(doc, create=True):
+    """Returns the LVarset VarSet of doc, creating it if needed"""
+    varset = doc.getObject(VARSET_NAME)
+    if varset is None and create:
+        varset = doc.addObject('App::VarSet', VARSET_NAME)
+    return varset
+
+
+class VarSetIndex:
+    """Set of the property names of a VarSet.
+
+    PropertiesList is rebuilt by the C++ binding at every access, so it is
+    read once per scan; add_property keeps the set in step with the VarSet,
+    and 'name in index' is O(1) for the scan as well as for the UI.
+    """
+
+    __slots__ = ("varset", "names")
+
+    def __init__(self, varset):
+        self.varset = varset
+        self.names = set()
+        self.refresh()
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def refresh(self):
+        """Rebuilds the set from the VarSet"""
+        if self.varset is not None:
+            self.names = set(self.varset.PropertiesList)
+        else:
+            self.names = set()
+
+    def add_property(self, type_id, name, group, shard=None):
+        """Adds name to the VarSet unless it is already there.
+
+        shard is there for ShardedIndex, a VarSetIndex has one VarSet only.
+        Returns True if the property has been created.
+        """
+        if name in self.names:
+            return False
+        self.varset.addProperty(type_id, name, group)
+        self.names.add(name)
+        return True
+
+    def assign(self, candidate, pending):
+        """Returns the name of the VarSet candidate goes into"""
+        return self.varset.Name if self.varset is not None else VARSET_NAME
+
+    def varset_of(self, name):
+        return self.varset
+
+    def owns(self, obj):
+        return obj is self.varset
+
+    def note_added(self, obj, name):
+        self.names.add(name)
+
+    def note_removed(self, obj, name):
+        self.names.discard(name)
+
+
+def make_index(doc, varset, sharding=None):
+    """Returns the index of the VarSet properties: a VarSetIndex, or a
+    ShardedIndex if sharding is "body" or a maximum number of properties
+    per VarSet (at least SHARD_MIN_CAP)"""
+    if sharding is None:
+        return VarSetIndex(varset)
+    if sharding == "body":
+        return ShardedIndex(doc, varset, "body")
+    return ShardedIndex(doc, varset, "cap", int(sharding))
+
+
+# properties of a VarSet that are not bindings: the static ones and the
+# hidden BINDINGS_PROPERTY
+VARSET_STATIC_PROPERTIES = frozenset((
+    'Label', 'Label2', 'Visibility', 'ExpressionEngine', 'LVarsetBindings'))
+
+# smallest cap of a ShardedIndex: a placement takes 4 properties, and a
+# candidate is never split over two shards
+SHARD_MIN_CAP = 4
+
+
+def top_container(obj):
+    """Returns the outermost Body/Part holding obj, None if there is none"""
+    top = None
+    getter = getattr(obj, "getParentGeoFeatureGroup", None)
+    while getter is not None:
+        parent = getter()
+        if parent is None:
+            break
+        top = parent
+        getter = getattr(parent, "getParentGeoFeatureGroup", None)
+    return top
+
+
+class ShardedIndex:
+    """VarSetIndex spread over several VarSets, the shards.
+
+    The shards are the base VarSet (LVarset) and the VarSets whose name
+    starts with it: LVarset_<Body> one per top-level Body/Part with
+    mode "body", LVarset001, LVarset002... each holding at most cap
+    properties with mode "cap". 'name in index' answers for all the shards
+    together, varset_of tells which one holds a property. The cap counts
+    the bound properties only, not VARSET_STATIC_PROPERTIES.
+    """
+
+    def __init__(self, doc, varset, mode="body", cap=500):
+        if mode not in ("body", "cap"):
+            raise ValueError(f"unknown sharding mode: {mode}")
+        if mode == "cap" and cap < SHARD_MIN_CAP:
+            raise ValueError(f"a shard must hold at least {SHARD_MIN_CAP} "
+                             f"properties, not {cap}")
+        self.doc = doc
+        self.varset = varset  # base VarSet
+        self.base = varset.Name if varset is not None else VARSET_NAME
+        self.mode = mode
+        self.cap = cap
+        self.shards = {}  # VarSet Name -> VarSetIndex
+        self.owner = {}  # property -> VarSet Name
+        self.sizes = {}  # VarSet Name -> bound properties
+        self.refresh()
+
+    def __contains__(self, name):
+        return name in self.owner
+
+    def __len__(self):
+        return len(self.owner)
+
+    def refresh(self):
+        self.shards = {}
+        self.owner = {}
+        self.sizes = {}
+        for varset in self.doc.findObjects("App::VarSet"):
+            if varset.Name.startswith(self.base):
+                self._attach(varset)
+
+    def _attach(self, varset):
+        index = self.shards[varset.Name] = VarSetIndex(varset)
+        for name in index.names:
+            self.owner.setdefault(name, varset.Name)
+        self.sizes[varset.Name] = len(index.names - VARSET_STATIC_PROPERTIES)
+        return index
+
+    def _count(self, Name, name, n):
+        if name not in VARSET_STATIC_PROPERTIES:
+            self.sizes[Name] = self.sizes.get(Name, 0) + n
+
+    def shard(self, Name):
+        """Returns the VarSetIndex of the shard Name, creating it"""
+        index = self.shards.get(Name)
+        if index is None:
+            varset = self.doc.getObject(Name)
+            if varset is None:
+                varset = self.doc.addObject('App::VarSet', Name)
+            index = self._attach(varset)
+            if Name == self.base:
+                self.varset = varset
+        return index
+
+    def add_property(self, type_id, name, group, shard=None):
+        index = self.shard(shard or self.base)
+        if name in index.names:
+            self.owner.setdefault(name, index.varset.Name)
+            return False
+        index.varset.addProperty(type_id, name, group)
+        # a document observer may have noted it already
+        self.note_added(index.varset, name)
+        return True
+
+    def assign(self, candidate, pending):
+        """Returns the name of the shard candidate goes into; pending
+        counts the properties already planned per shard"""
+        if self.mode == "body":
+            top = top_container(self.doc.getObject(candidate.object_name))
+            return f"{self.base}_{top.Name}" if top is not None else self.base
+        size = len(candidate.varset_names())
+        k = 0
+        while True:
+            Name = self.base if k == 0 else f"{self.base}{k:03d}"
+            used = self.sizes.get(Name, 0) + pending.get(Name, 0)
+            if used + size <= self.cap:
+                return Name
+            k += 1
+
+    def varset_of(self, name):
+        Name = self.owner.get(name)
+        return self.shards[Name].varset if Name is not None else None
+
+    def owns(self, obj):
+        return self.shards.get(obj.Name) is not None
+
+    def note_added(self, obj, name):
+        names = self.shards[obj.Name].names
+        if name not in names:
+            names.add(name)
+            self._count(obj.Name, name, 1)
+        self.owner.setdefault(name, obj.Name)
+
+    def note_removed(self, obj, name):
+        names = self.shards[obj.Name].names
+        if name in names:
+            names.discard(name)
+            self._count(obj.Name, name, -1)
+        if self.owner.get(name) == obj.Name:
+            del self.owner[name]
+
+
+# ------------------------------------------------
+#              CONSTRAINT EXTRACTION
+# ------------------------------------------------
+
+# constraint types that carry a datum (the others, e.g. Coincident, make
+# getDatum raise)
+DATUM_CONSTRAINT_TYPES = frozenset((
+    'Distance', 'DistanceX', 'DistanceY', 'Radius', 'Diameter', 'Angle',
+    'SnellsLaw', 'Weight'
+))
+
+
+def extract_constraints(sketch):
+    """Returns (index, name, value) for every driving datum constraint of
+    sketch.
+
+    sketch.Constraints copies the whole list out of C++ at every access, so
+    it is read once; getDatum is called once per datum constraint and never
+    for the constraints that have no datum. name is the constraint name or
+    'ConstraintN' (N = index + 1) for the unnamed ones, value is a float.
+    """
+    result = []
+    for ii, Constraint in enumerate(sketch.Constraints):
+        Type = getattr(Constraint, "Type", None)
+        if Type is not None and Type not in DATUM_CONSTRAINT_TYPES:
+            continue  # e.g. Coincident, nothing to bind
+        if not getattr(Constraint, "Driving", True):
+            continue  # writable data, but it's a reference
+        try:
+            Datum = sketch.getDatum(ii)
+        except Exception:
+            continue
+        Data = float(getattr(Datum, "Value", Datum))
+        result.append((ii, Constraint.Name or f"Constraint{ii+1}", Data))
+    return result
+
+
+# ------------------------------------------------
+#              PROPERTY SCHEMA CACHE
+# ------------------------------------------------
+
+
+def value_kind(XObject, Property):
+    """Returns the VALUE_* kind of Property, None if it can't be bound"""
+    if Property in ("AttachmentOffset", "Placement"):
+        return VALUE_PLACEMENT
+    if Property == "Constraints":
+        return VALUE_CONSTRAINTS
+    try:
+        type_id = XObject.getTypeIdOfProperty(Property)
+    except Exception:
+        return VALUE_QUANTITY
+    if type_id in FLOAT_PROPERTY_TYPES:
+        return VALUE_FLOAT
+    if type_id.startswith(('App::PropertyInteger', 'App::PropertyBool',
+                           'App::PropertyEnumeration', 'App::PropertyString',
+                           'App::PropertyLink', 'App::PropertyVector',
+                           'App::PropertyColor', 'App::PropertyMap')):
+        return None
+    return VALUE_QUANTITY
+
+
+class PropertySchema:
+    """The allowed properties of a TypeId and their value kind.
+
+    source is the PropertiesList the schema has been built from: an object
+    of the same TypeId with extra (dynamic) properties gets its own schema.
+    """
+
+    __slots__ = ("type_id", "source", "entries")
+
+    def __init__(self, XObject, source):
+        self.type_id = XObject.TypeId
+        self.source = source
+        entries = []
+        for Property in source:
+            if Property not in AllowedProperties:
+                continue
+            kind = value_kind(XObject, Property)
+            if kind is not None:
+                entries.append((Property, kind))
+        self.entries = tuple(entries)
+
+
+class SchemaCache:
+    """PropertySchema of every TypeId met during the scans.
+
+    The ReadOnly status is not part of the schema: FreeCAD sets it per
+    object (e.g. the Placement of an attached sketch), so it is still read,
+    but only for the few properties listed in the schema.
+    """
+
+    def __init__(self):
+        self.schemas = {}
+        self.allowed_types = {}
+
+    def __len__(self):
+        return len(self.schemas)
+
+    def is_allowed(self, type_id):
+        allowed = self.allowed_types.get(type_id)
+        if allowed is None:
+            allowed = type_id.split("::")[-1] not in NotAllowedObjects
+            self.allowed_types[type_id] = allowed
+        return allowed
+
+    def get(self, XObject):
+        """Returns the PropertySchema of XObject, None for the objects that
+        are not allowed"""
+        type_id = XObject.TypeId
+        if not self.is_allowed(type_id):
+            return None
+        source = XObject.PropertiesList
+        schema = self.schemas.get(type_id)
+        if schema is None:
+            schema = self.schemas[type_id] = PropertySchema(XObject, source)
+        elif schema.source != source:
+            # dynamic properties, cached by the complete list
+            key = (type_id, tuple(source))
+            schema = self.schemas.get(key)
+            if schema is None:
+                schema = self.schemas[key] = PropertySchema(XObject, source)
+        return schema
+
+
+# ------------------------------------------------
+#              OBJECT DATA EXTRACTION
+# ------------------------------------------------
+
+
+def scan_object(XObject, bound, schemas):
+    """Yields the Candidates of XObject whose VarSet property is not in bound.
+
+    bound is anything supporting 'in' on VarSet property names, usually
+    a VarSetIndex; schemas is the SchemaCache of the scan.
+    """
+    schema = schemas.get(XObject)
+    if schema is None or not schema.entries:
+        return  # if it is a not allowed object, ignore it
+
+    Name = XObject.Name
+    Label = clean_label(XObject.Label)
+    for Property, kind in schema.entries:
+        if 'ReadOnly' in XObject.getPropertyStatus(Property):
+            continue  # cannot be modified, skip to next
+
+        if kind == VALUE_PLACEMENT:
+            Ckind = KIND_ATTOFF if Property == "AttachmentOffset" \
+                else KIND_PLACEMENT
+            candidate = Candidate(
+                Name, Label, Ckind, Ckind,
+                placement_values(getattr(XObject, Property)))
+            if candidate.bound_name() not in bound:
+                yield candidate
+
+        elif kind == VALUE_CONSTRAINTS:
+            for ii, Cname, Data in extract_constraints(XObject):
+                if f"{Name}{Cname}" not in bound:
+                    yield Candidate(
+                        Name, Label, KIND_CONSTRAINT, Cname, Data, ii)
+
+        else:
+            if f"{Name}{Property}" in bound:
+                continue
+            Value = getattr(XObject, Property)
+            if kind == VALUE_FLOAT:
+                Data = float(Value)
+            else:
+                Data = quantity_value(Value)
+            if Data is not None:
+                yield Candidate(Name, Label, KIND_PROPERTY, Property, Data)
+
+
+# ------------------------------------------------
+#                 PROFILING HOOK
+# ------------------------------------------------
+
+# Profiler of LVarset_profile, installed by set_profiler
+_profiler = None
+
+
+def set_profiler(profiler):
+    """Makes the scans and the bindings report to profiler (None: stop)"""
+    global _profiler
+    _profiler = profiler
+
+
+def _phase(name):
+    return _profiler.phase(name) if _profiler is not None else nullcontext()
+
+
+def _scan_one(XObject, bound, schemas):
+    """scan_object, timed and probed if a profiler is installed"""
+    if _profiler is None:
+        return scan_object(XObject, bound, schemas)
+    return _profiler.scan_object(scan_object, XObject, bound, schemas)
+
+
+def scan_document(doc, varset, index=None, schemas=None,
+                  include_bound=False, bindings=None):
+    """Yields a Candidate for every property of doc that can still be bound
+    to varset, object after object, in document order; with include_bound
+    the ones already bound too.
+
+    index is the VarSetIndex of varset and schemas a SchemaCache, both built
+    here if not given. bindings is the BindingIndex of varset, loaded here
+    if varset has one saved: the properties it records in another VarSet
+    (moved there by rebind) are bound too. Being a generator, the caller
+    can stop, time or stream the scan.
+    """
+    if index is None:
+        index = VarSetIndex(varset)
+    if schemas is None:
+        schemas = SchemaCache()
+    if include_bound:
+        bound = ()
+    else:
+        if bindings is None and BINDINGS_PROPERTY in index:
+            bindings = BindingIndex.load(doc, varset)
+        bound = BoundNames(index, bindings)
+    for XObject in doc.Objects:
+        if XObject is varset:
+            continue
+        yield from _scan_one(XObject, bound, schemas)
+
+
+# ------------------------------------------------
+#               INCREMENTAL SCAN CACHE
+# ------------------------------------------------
+
+# properties whose change makes an object to be rescanned
+RESCAN_PROPERTIES = AllowedProperties | {'Label'}
+
+
+class ScanCache:
+    """Candidates of a document, rescanned only where the document changed.
+
+    The candidates are kept per object and unfiltered: whether they are
+    already bound is decided through the VarSetIndex when they are read,
+    so binding a property never requires a rescan. Once attach() has
+    registered the document observer, the objects created, changed or
+    deleted are the only ones scanned again by refresh().
+    """
+
+    def __init__(self, doc, varset, sharding=None):
+        self.doc = doc
+        self.varset = varset
+        self.sharding = sharding
+        self.index = make_index(doc, varset, sharding)
+        self.schemas = SchemaCache()
+        self.results = {}  # object Name -> [Candidate, ...]
+        self.dirty = set()  # object Names to rescan
+        self.complete = False  # False until the first full scan
+        self.observer = None
+        self.bindings = None  # BindingIndex of varset, loaded by bound()
+
+    def __len__(self):
+        return sum(len(x) for x in self.results.values())
+
+    def refresh(self):
+        """Brings the candidates up to date, returns the number of objects
+        scanned"""
+        scanned = 0
+        for Name, Candidates, rescanned in self.iter_refresh():
+            scanned += rescanned
+        return scanned
+
+    def iter_refresh(self):
+        """refresh as a generator: yields (object Name, Candidates,
+        rescanned) object after object, in document order.
+
+        The scan can be driven a slice at a time and abandoned at any
+        point: an interrupted full scan is just done again next time.
+        """
+        if not self.complete or self.observer is None:
+            # without observer nothing tells what changed
+            self.complete = False
+            self.results = {}
+            self.dirty.clear()
+            for XObject in self.doc.Objects:
+                if XObject is self.varset:
+                    continue
+                Candidates = self._scan(XObject)
+                if Candidates is not None:
+                    yield XObject.Name, Candidates, 1
+            self.complete = True
+            return
+
+        # the observer may add Names while the caller works between
+        # two objects
+        rescanned = set()
+        while self.dirty:
+            Name = self.dirty.pop()
+            XObject = self.doc.getObject(Name)
+            if XObject is None:
+                self.results.pop(Name, None)
+            elif XObject is not self.varset:
+                self._scan(XObject)
+                rescanned.add(Name)
+        for Name, Candidates in list(self.results.items()):
+            yield Name, Candidates, int(Name in rescanned)
+
+    def _scan(self, XObject):
+        try:
+            Name = XObject.Name
+            Candidates = list(_scan_one(XObject, (), self.schemas))
+        except (ReferenceError, RuntimeError):
+            return None  # deleted while the scan was running
+        self.results[Name] = Candidates
+        return Candidates
+
+    def bound(self):
+        """Returns the bound VarSet properties, as a BoundNames"""
+        if self.bindings is None and BINDINGS_PROPERTY in self.index:
+            self.bindings = BindingIndex.load(self.doc, self.varset)
+        return BoundNames(self.index, self.bindings)
+
+    def iter_candidates(self):
+        """Yields (object Name, Candidates not yet bound) object after
+        object, refreshing the cache on the way"""
+        bound = self.bound()
+        for Name, Candidates, rescanned in self.iter_refresh():
+            yield Name, [candidate for candidate in Candidates
+                         if candidate.bound_name() not in bound]
+
+    def candidates(self):
+        """Yields the Candidates not yet bound, in document order"""
+        for Name, Candidates in self.iter_candidates():
+            yield from Candidates
+
+    def bound_candidates(self):
+        """Yields the Candidates already bound, as of the last refresh"""
+        bound = self.bound()
+        for Candidates in self.results.values():
+            for candidate in Candidates:
+                if candidate.bound_name() in bound:
+                    yield candidate
+
+    def invalidate(self, Name=None):
+        """Marks the object Name to be rescanned, or everything if None"""
+        if Name is None:
+            self.complete = False
+        else:
+            self.dirty.add(Name)
+
+    # ----------------------------------------
+    #              DOCUMENT OBSERVER
+    # ----------------------------------------
+
+    def attach(self):
+        """Registers the document observer"""
+        if self.observer is None:
+            import FreeCAD
+            self.observer = _ScanObserver(self)
+            FreeCAD.addDocumentObserver(self.observer)
+
+    def detach(self):
+        """Unregisters the document observer"""
+        if self.observer is not None:
+            import FreeCAD
+            FreeCAD.removeDocumentObserver(self.observer)
+            self.observer = None
+
+
+class _ScanObserver:
+    """FreeCAD document observer feeding ScanCache.invalidate"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def _mine(self, obj):
+        return getattr(obj, "Document", None) is self.cache.doc
+
+    def slotCreatedObject(self, obj):
+        if self._mine(obj):
+            self.cache.invalidate(obj.Name)
+
+    def slotDeletedObject(self, obj):
+        if not self._mine(obj):
+            return
+        if obj is self.cache.varset or self.cache.index.owns(obj):
+            _drop_scan_cache(self.cache.doc)
+        else:
+            self.cache.invalidate(obj.Name)
+
+    def slotChangedObject(self, obj, prop):
+        if not self._mine(obj):
+            return
+        if prop == BINDINGS_PROPERTY and obj is self.cache.varset:
+            self.cache.bindings = None  # read again by bound()
+            return
+        if prop not in RESCAN_PROPERTIES:
+            return
+        if obj is not self.cache.varset:
+            self.cache.invalidate(obj.Name)
+
+    def slotAppendDynamicProperty(self, obj, prop):
+        if self._mine(obj) and self.cache.index.owns(obj):
+            self.cache.index.note_added(obj, prop)
+
+    def slotRemoveDynamicProperty(self, obj, prop):
+        if self._mine(obj) and self.cache.index.owns(obj):
+            self.cache.index.note_removed(obj, prop)
+
+    def slotDeletedDocument(self, doc):
+        if doc is self.cache.doc:
+            _drop_scan_cache(doc)
+
+
+_scan_caches = {}  # document Name -> ScanCache
+
+
+def get_scan_cache(doc, varset, observe=True, sharding=None):
+    """Returns the ScanCache of doc, kept between two runs of the macro.
+
+    With observe the cache registers its document observer, otherwise every
+    refresh is a full scan. sharding is passed to make_index.
+    """
+    cache = _scan_caches.get(doc.Name)
+    if cache is None or cache.doc is not doc or cache.varset is not varset \
+            or cache.sharding != sharding:
+        if cache is not None:
+            cache.detach()
+        cache = _scan_caches[doc.Name] = ScanCache(doc, varset, sharding)
+    if observe:
+        cache.attach()
+    return cache
+
+
+def _drop_scan_cache(doc):
+    cache = _scan_caches.pop(doc.Name, None)
+    if cache is not None:
+        cache.detach()
+
+
+# ------------------------------------------------
+#                 CANDIDATE STORE
+# ------------------------------------------------
+
+
+class CandidateStore:
+    """The Candidates offered to the user, with their selection.
+
+    Candidates are addressed by their position (row), which never changes:
+    the selection is a bytearray indexed by row, a removed row is only
+    marked dead, and the rows of every object are kept apart so that one
+    object can be listed without walking the others. Lookup by
+    (object name, candidate name), selection and removal are all O(1).
+    """
+
+    __slots__ = ("candidates", "selection", "alive", "keys", "groups",
+                 "sizes", "labels", "count")
+
+    def __init__(self, candidates=()):
+        self.candidates = []
+        self.selection = bytearray()
+        self.alive = bytearray()
+        self.keys = {}  # (object name, candidate name) -> row
+        self.groups = {}  # object name -> [row, ...], in document order
+        self.sizes = {}  # object name -> rows alive
+        self.labels = {}  # object name -> label
+        self.count = 0  # rows alive
+        self.extend(candidates)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for row, candidate in enumerate(self.candidates):
+            if self.alive[row]:
+                yield candidate
+
+    def add(self, candidate):
+        """Adds candidate and returns its row; a candidate with the same
+        key replaces the previous one"""
+        old = self.keys.get(candidate.key)
+        if old is not None:
+            self.remove(old)
+        row = len(self.candidates)
+        self.candidates.append(candidate)
+        self.selection.append(0)
+        self.alive.append(1)
+        self.keys[candidate.key] = row
+        Name = candidate.object_name
+        group = self.groups.get(Name)
+        if group is None:
+            group = self.groups[Name] = []
+            self.sizes[Name] = 0
+            self.labels[Name] = candidate.label
+        group.append(row)
+        self.sizes[Name] += 1
+        self.count += 1
+        return row
+
+    def extend(self, candidates):
+        for candidate in candidates:
+            self.add(candidate)
+
+    def find(self, object_name, name):
+        """Returns the row of a candidate, -1 if there is none"""
+        row = self.keys.get((object_name, name))
+        return -1 if row is None else row
+
+    def remove(self, row):
+        if not self.alive[row]:
+            return
+        candidate = self.candidates[row]
+        self.alive[row] = 0
+        self.selection[row] = 0
+        del self.keys[candidate.key]
+        self.count -= 1
+        Name = candidate.object_name
+        self.sizes[Name] -= 1
+        if not self.sizes[Name]:
+            # last candidate gone: forget the object
+            del self.groups[Name], self.sizes[Name], self.labels[Name]
+
+    def objects(self):
+        """Returns the names of the objects that have candidates left"""
+        return list(self.groups)
+
+    def rows(self, object_name):
+        """Returns the rows alive of object_name"""
+        alive = self.alive
+        return [row for row in self.groups.get(object_name, ()) if alive[row]]
+
+    def is_selected(self, row):
+        return bool(self.selection[row])
+
+    def set_selected(self, row, flag):
+        if self.alive[row]:
+            self.selection[row] = 1 if flag else 0
+
+    def select_rows(self, rows, flag):
+        flag = 1 if flag else 0
+        selection = self.selection
+        alive = self.alive
+        for row in rows:
+            if alive[row]:
+                selection[row] = flag
+
+    def selected(self):
+        """Returns the rows selected"""
+        return list(compress(range(len(self.selection)), self.selection))
+
+    def remove_rows(self, rows):
+        for row in rows:
+            self.remove(row)
+
+
+# ------------------------------------------------
+#                  SEARCH INDEX
+# ------------------------------------------------
+
+
+class SearchIndex:
+    """Substring index over the object labels, object names and property
+    names of a CandidateStore.
+
+    All the texts are lower-cased and joined in a single string, so that a
+    selective query is a few str.find calls; a query that extends the
+    previous one (the user typing) only filters the previous matches.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.texts = []
+        self.owners = []  # (object name, row), row -1 for the object itself
+        for Name in store.objects():
+            self.texts.append(f"{store.labels[Name]}\t{Name}".lower())
+            self.owners.append((Name, -1))
+            for row in store.rows(Name):
+                self.texts.append(store.candidates[row].name.lower())
+                self.owners.append((Name, row))
+        self.starts = []
+        offset = 0
+        for text in self.texts:
+            self.starts.append(offset)
+            offset += len(text) + 1
+        self.haystack = "\n".join(self.texts)
+        self.last = ("", None)  # previous query and its matches
+
+    def entries(self, query):
+        """Returns the indices of the texts containing query, None if the
+        query is empty"""
+        q = query.strip().lower()
+        if not q:
+            return None
+        last_q, last = self.last
+        texts = self.texts
+        if last is not None and last_q in q:
+            found = [i for i in last if q in texts[i]]
+        elif self.haystack.count(q) * 16 > len(texts):
+            # matches everywhere: one pass over the texts is cheaper
+            found = [i for i, text in enumerate(texts) if q in text]
+        else:
+            found = []
+            haystack, starts = self.haystack, self.starts
+            pos = haystack.find(q)
+            while pos >= 0:
+                i = bisect_right(starts, pos) - 1
+                found.append(i)
+                if i + 1 == len(starts):
+                    break
+                pos = haystack.find(q, starts[i + 1])
+        self.last = (q, found)
+        return found
+
+    def search(self, query):
+        """Returns {object name: rows} of the candidates matching query, in
+        document order, or None if the query is empty.
+
+        rows is None when the label or the name of the object matches:
+        all its candidates are shown.
+        """
+        found = self.entries(query)
+        if found is None:
+            return None
+        alive = self.store.alive
+        groups = self.store.groups
+        result = {}
+        for i in found:
+            Name, row = self.owners[i]
+            if Name not in groups:
+                continue  # all bound in the meantime
+            if row < 0:
+                result[Name] = None
+            elif not alive[row]:
+                continue
+            elif Name not in result:
+                result[Name] = [row]
+            elif result[Name] is not None:
+                result[Name].append(row)
+        return result
+
+
+# ------------------------------------------------
+#                  BINDING PLAN
+# ------------------------------------------------
+
+
+class BindingPlan:
+    """Everything CompileVars writes to bind a set of Candidates.
+
+    properties: [(type_id, name, group, value, VarSet name), ...] to create
+    values: [(name, value, VarSet name), ...] existing, to overwrite
+    expressions: [(object name, path, expression), ...]
+    stale: [(name, object name, path), ...] recorded bindings to drop
+    obsolete: [name, ...] properties to remove, bound to nothing any more
+    values, stale and obsolete are filled by sync_plan only.
+    """
+
+    __slots__ = ("candidates", "properties", "values", "expressions",
+                 "stale", "obsolete")
+
+    def __init__(self):
+        self.candidates = []
+        self.properties = []
+        self.values = []
+        self.expressions = []
+        self.stale = []
+        self.obsolete = []
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def __bool__(self):
+        return bool(self.candidates or self.properties or self.values
+                    or self.expressions or self.stale or self.obsolete)
+
+    def __repr__(self):
+        return (f"BindingPlan({len(self.candidates)} candidates, "
+                f"{len(self.properties)} properties, "
+                f"{len(self.values)} values, "
+                f"{len(self.expressions)} expressions, "
+                f"{len(self.stale)} stale, "
+                f"{len(self.obsolete)} obsolete)")
+
+
+def build_plan(candidates, index=None):
+    """Returns the BindingPlan of candidates, nothing is modified.
+
+    index, a VarSetIndex or ShardedIndex, chooses the VarSet of every
+    candidate; without it everything goes into LVarset.
+    """
+    plan = BindingPlan()
+    pending = {}  # VarSet Name -> properties planned
+    for candidate in candidates:
+        plan.candidates.append(candidate)
+        if index is not None:
+            Varset = index.assign(candidate, pending)
+        else:
+            Varset = VARSET_NAME
+        pending[Varset] = pending.get(Varset, 0) + \
+            len(candidate.varset_names())
+        for type_id, Name, Value in candidate_properties(candidate):
+            plan.properties.append(
+                (type_id, Name, candidate.label, Value, Varset))
+        for Path, Expression in binding_expressions(candidate, Varset):
+            plan.expressions.append((candidate.object_name, Path, Expression))
+    return plan
+
+
+def candidate_properties(candidate):
+    """Returns the (type_id, name, value) of the VarSet properties of
+    candidate"""
+    if candidate.kind in PLACEMENT_KINDS:
+        Types = ('App::PropertyAngle',) + ('App::PropertyFloat',) * 3
+        Values = candidate.value
+    else:
+        Types = ('App::PropertyFloat',)
+        Values = (candidate.value,)
+    return list(zip(Types, candidate.varset_names(), Values))
+
+
+def normalize_path(path):
+    """ExpressionEngine may list the paths with a leading '.'"""
+    return path[1:] if path.startswith(".") else path
+
+
+def expression_map(obj):
+    """Returns {path: expression} of the ExpressionEngine of obj"""
+    return {normalize_path(Path): Expression
+            for Path, Expression in obj.ExpressionEngine}
+
+
+def apply_plan(doc, index, plan, dry_run=False, recompute=True,
+               full_recompute=False, bindings=None):
+    """Writes plan to the VarSet of index and to the objects of doc.
+
+    The whole plan is one undo step: it runs inside a single transaction,
+    with the recomputes frozen, and there is one recompute at the end (if
+    recompute), limited to the objects bound and their dependents unless
+    full_recompute. If anything fails the transaction is aborted,
+    whatever was written is taken back and the exception is raised again.
+    With dry_run nothing is touched and plan is just returned. bindings,
+    a BindingIndex, records the new bindings and is saved with them.
+    """
+    if not dry_run:
+        for _ in iter_apply_plan(doc, index, plan, recompute, full_recompute,
+                                 bindings):
+            pass
+    return plan
+
+
+def iter_apply_plan(doc, index, plan, recompute=True, full_recompute=False,
+                    bindings=None):
+    """apply_plan as a generator, yielding the number of writes done (out
+    of plan_steps(plan)) after each of them, so that the caller can spread
+    the work over time. Closing the generator before the end (e.g. a
+    Cancel button) takes back the whole plan like an error does.
+    """
+    if not plan:
+        return  # nothing to write: no transaction, no recompute
+    added = []  # (VarSet, property) created
+    written = []  # (VarSet, property, previous value)
+    done = []  # (object, path, previous expression)
+    removed = []  # (VarSet, type_id, property, group, previous value)
+    # shards the plan creates (see ShardedIndex.shard)
+    created = {Varset for type_id, Name, Group, Value, Varset
+               in plan.properties if doc.getObject(Varset) is None}
+    frozen = getattr(doc, "RecomputesFrozen", None)
+    step = 0
+
+    doc.openTransaction("LVarset")
+    if frozen is not None:
+        doc.RecomputesFrozen = True
+    try:
+        for type_id, Name, Group, Value, Varset in plan.properties:
+            if index.add_property(type_id, Name, Group, Varset):
+                added.append((index.varset_of(Name), Name))
+            setattr(index.varset_of(Name), Name, Value)
+            step += 1
+            yield step
+        for Name, Value, Varset in plan.values:
+            varset = doc.getObject(Varset)
+            written.append((varset, Name, getattr(varset, Name)))
+            setattr(varset, Name, Value)
+            step += 1
+            yield step
+        previous = {}
+        for Object, Path, Expression in plan.expressions:
+            obj = doc.getObject(Object)
+            if Object not in previous:
+                previous[Object] = expression_map(obj)
+            done.append((obj, Path, previous[Object].get(Path)))
+            obj.setExpression(Path, Expression)
+            step += 1
+            yield step
+        for Name in plan.obsolete:
+            varset = index.varset_of(Name)
+            if varset is not None:
+                removed.append((varset, varset.getTypeIdOfProperty(Name),
+                                Name, varset.getGroupOfProperty(Name),
+                                getattr(varset, Name)))
+                varset.removeProperty(Name)
+                index.note_removed(varset, Name)
+            step += 1
+            yield step
+        if bindings is not None:
+            with _phase("bind.record"):
+                record_plan(bindings, plan)
+    except BaseException:
+        # errors, but also GeneratorExit when the caller gives up
+        doc.abortTransaction()
+        # the undo may not cover dynamic properties, make sure
+        for varset, type_id, Name, Group, Value in reversed(removed):
+            try:
+                if Name not in varset.PropertiesList:
+                    varset.addProperty(type_id, Name, Group)
+                setattr(varset, Name, Value)
+            except Exception:
+                pass
+        for obj, Path, Expression in reversed(done):
+            try:
+                obj.setExpression(Path, Expression)
+            except Exception:
+                pass
+        for varset, Name, Value in reversed(written):
+            try:
+                setattr(varset, Name, Value)
+            except Exception:
+                pass
+        for varset, Name in reversed(added):
+            try:
+                if Name in varset.PropertiesList:
+                    varset.removeProperty(Name)
+            except Exception:
+                pass  # e.g. a shard already deleted by the abort
+        # without undo (FreeCADCmd) the new shards are still there
+        for Varset in created:
+            try:
+                if doc.getObject(Varset) is not None:
+                    doc.removeObject(Varset)
+            except Exception:
+                pass
+        index.refresh()
+        if bindings is not None:
+            reloaded = BindingIndex.load(bindings.doc, bindings.varset)
+            bindings.bindings = reloaded.bindings
+            bindings.objects = reloaded.objects
+        raise
+    else:
+        doc.commitTransaction()
+    finally:
+        if frozen is not None:
+            doc.RecomputesFrozen = frozen
+
+    if _profiler is not None:
+        _profiler.count("addProperty", len(added))
+        _profiler.count("setattr", len(plan.properties) + len(written))
+        _profiler.count("setExpression", len(done))
+        _profiler.count("ExpressionEngine", len(previous))
+        _profiler.count("removeProperty", len(removed))
+    if recompute:
+        with _phase("recompute"):
+            count = recompute_plan(doc, plan, full_recompute)
+        if _profiler is not None:
+            _profiler.count("recompute")
+            _profiler.count("recompute.objects",
+                            len(doc.Objects) if count is None else count)
+
+
+def record_plan(bindings, plan):
+    """Adds the expressions of plan to bindings, drops its stale bindings
+    and saves it"""
+    groups = {Name: (Group, Varset)
+              for type_id, Name, Group, Value, Varset in plan.properties}
+    for Name, Object, Path in plan.stale:
+        bindings.discard(Name, Object)
+    for Object, Path, Expression in plan.expressions:
+        Varset, Name = Expression.split(".", 1)
+        if Name not in groups:
+            entry = bindings.bindings.get(Name)
+            groups[Name] = (entry["group"] if entry else "", Varset)
+        Group, Varset = groups[Name]
+        bindings.add(Name, Object, Path, Group, Varset)
+    bindings.save()
+
+
+def plan_steps(plan):
+    """Number of steps yielded by iter_apply_plan"""
+    return (len(plan.properties) + len(plan.values)
+            + len(plan.expressions) + len(plan.obsolete))
+
+
+# ------------------------------------------------
+#                 MINIMAL-DIFF SYNC
+# ------------------------------------------------
+
+
+def same_value(current, value, tolerance=1e-9):
+    """True if the VarSet value current (float or Quantity) is value"""
+    current = float(getattr(current, "Value", current))
+    return abs(current - value) <= tolerance * max(1.0, abs(value))
+
+
+def sync_plan(doc, index, candidates, bindings=None):
+    """Returns the BindingPlan that brings doc to the binding of
+    candidates writing only what differs; not plan means already in sync.
+
+    candidates are all the wanted bindings, the ones already there
+    included (see scan_document). A missing VarSet property is added with
+    the value of the object. A missing or wrong expression is pointed again
+    at its property, which first takes the value of the object if it
+    differs, so that the model does not move. A binding in place is left
+    alone. With bindings, a BindingIndex, the recorded bindings whose
+    object is gone or whose expression points elsewhere are stale, and the
+    properties they leave bound to nothing are obsolete.
+    """
+    plan = BindingPlan()
+    pending = {}  # VarSet Name -> properties planned
+    engines = {}  # object Name -> {path: expression}
+    wanted = set()  # (object Name, path) bound by candidates
+    names = set()  # VarSet properties of candidates
+
+    def engine(Object):
+        current = engines.get(Object)
+        if current is None:
+            obj = doc.getObject(Object)
+            current = engines[Object] = \
+                expression_map(obj) if obj is not None else {}
+        return current
+
+    def holder(Name):
+        """VarSet holding Name, None if it is still to be added"""
+        if Name in index:
+            return index.varset_of(Name)
+        entry = bindings.bindings.get(Name) if bindings is not None else None
+        if entry is not None and "varset" in entry:
+            return bindings.varset_of(Name)  # moved by rebind
+        return None
+
+    for candidate in candidates:
+        Object = candidate.object_name
+        Holder = holder(candidate.bound_name())
+        if Holder is not None:
+            Varset = Holder.Name
+        else:
+            Varset = index.assign(candidate, pending)
+            pending[Varset] = pending.get(Varset, 0) + \
+                len(candidate.varset_names())
+        current = engine(Object)
+        changed = False
+        for (type_id, Name, Value), (Path, Expression) in zip(
+                candidate_properties(candidate),
+                binding_expressions(candidate, Varset)):
+            names.add(Name)
+            wanted.add((Object, Path))
+            Existing = current.get(Path)
+            if candidate.kind == KIND_CONSTRAINT:
+                # the ExpressionEngine lists named constraints by name
+                Alias = f"Constraints.{candidate.name}"
+                wanted.add((Object, Alias))
+                if Existing is None:
+                    Existing = current.get(Alias)
+            Holder = holder(Name)
+            if Holder is None:
+                plan.properties.append(
+                    (type_id, Name, candidate.label, Value, Varset))
+            elif Existing != Expression and not same_value(
+                    getattr(Holder, Name), Value):
+                plan.values.append((Name, Value, Varset))
+            if Existing != Expression:
+                plan.expressions.append((Object, Path, Expression))
+                changed = True
+        if changed:
+            plan.candidates.append(candidate)
+
+    if bindings is not None:
+        for Name, entry in bindings.bindings.items():
+            Expression = f"{entry.get('varset', bindings.varset.Name)}.{Name}"
+            left = False
+            for Object, Path in entry["targets"]:
+                if (Object, Path) in wanted or \
+                        engine(Object).get(Path) == Expression:
+                    left = True
+                else:
+                    plan.stale.append((Name, Object, Path))
+            if not left and Name not in names and Name in index:
+                plan.obsolete.append(Name)
+    return plan
+
+
+# ------------------------------------------------
+#                SCOPED RECOMPUTE
+# ------------------------------------------------
+
+
+def dependents(doc, names):
+    """Returns the objects named in names and, following InList, all the
+    objects that depend on them"""
+    result = []
+    seen = set()
+    stack = [doc.getObject(Name) for Name in names]
+    while stack:
+        obj = stack.pop()
+        if obj is None or obj.Name in seen:
+            continue
+        seen.add(obj.Name)
+        result.append(obj)
+        stack.extend(obj.InList)
+    return result
+
+
+def recompute_plan(doc, plan, full=False):
+    """Recomputes what plan has touched: the VarSets, the bound objects and
+    their dependents; the whole document only if full.
+
+    Returns the number of objects handed to the recompute (None if full).
+    """
+    if full:
+        doc.recompute()
+        return None
+    # not the dependents of the VarSets: they hold the earlier bindings
+    Varsets = [x[4] for x in plan.properties]
+    Varsets.extend(x[2] for x in plan.values)
+    objs = [doc.getObject(Varset) for Varset in dict.fromkeys(Varsets)]
+    objs = [obj for obj in objs if obj is not None]
+    objs.extend(dependents(doc, dict.fromkeys(
+        Object for Object, Path, Expression in plan.expressions)))
+    if objs:
+        doc.recompute(objs)
+    return len(objs)
+
+
+# ------------------------------------------------
+#              REVERSE BINDING INDEX
+# ------------------------------------------------
+
+# hidden property of the VarSet where the BindingIndex is saved
+BINDINGS_PROPERTY = "LVarsetBindings"  # in VARSET_STATIC_PROPERTIES too
+
+# VarSet properties of a placement, see Candidate.varset_names
+PLACEMENT_SUFFIXES = ("Angle", "PosX", "PosY", "PosZ")
+PLACEMENT_NAME = re.compile(
+    rf"^(\w+(?:{'|'.join(PLACEMENT_KINDS)}))"
+    rf"(?:{'|'.join(PLACEMENT_SUFFIXES)})$")
+
+
+class BindingIndex:
+    """Which expressions point at which VarSet property.
+
+    bindings maps a VarSet property to its group and to the
+    (object name, expression path) pairs bound to it; objects is the other
+    way round. It is saved as JSON in the hidden BINDINGS_PROPERTY of the
+    VarSet, and rebuilt from the ExpressionEngine of every object only
+    when that property is missing. The properties held by a shard of the
+    VarSet (see ShardedIndex) are kept here too, with the shard name.
+    """
+
+    def __init__(self, doc, varset):
+        self.doc = doc
+        self.varset = varset
+        # property -> {"group": g, "targets": [[o, p]], "varset": shard}
+        self.bindings = {}
+        self.objects = {}  # object name -> {property, ...}
+
+    def __len__(self):
+        return sum(len(x["targets"]) for x in self.bindings.values())
+
+    @classmethod
+    def load(cls, doc, varset, rebuild=True):
+        """Returns the BindingIndex saved in varset, or rebuilt (empty
+        without rebuild, e.g. for a VarSet just created)"""
+        index = cls(doc, varset)
+        data = None
+        if BINDINGS_PROPERTY in varset.PropertiesList:
+            try:
+                data = json.loads(getattr(varset, BINDINGS_PROPERTY) or "{}")
+            except ValueError:
+                data = None
+        if data is None:
+            if rebuild:
+                index.rebuild()
+        else:
+            for Name, entry in data.items():
+                for Object, Path in entry["targets"]:
+                    index.add(Name, Object, Path, entry.get("group", ""),
+                              entry.get("varset"))
+        return index
+
+    def rebuild(self):
+        """Reads the bindings back from the ExpressionEngine of every
+        object: O(document), done only when nothing was saved"""
+        self.bindings = {}
+        self.objects = {}
+        base = self.varset.Name
+        pattern = re.compile(
+            rf"(?<![\w.])(?:<<)?({re.escape(base)}\w*)(?:>>)?\.(\w+)")
+        shards = {}  # VarSet Name -> (VarSet, its properties) or None
+        for obj in self.doc.Objects:
+            if obj.TypeId == 'App::VarSet':
+                continue
+            for Path, Expression in obj.ExpressionEngine:
+                for Varset, Name in pattern.findall(Expression):
+                    if Varset not in shards:
+                        shard = self.doc.getObject(Varset)
+                        shards[Varset] = None if shard is None or \
+                            shard.TypeId != 'App::VarSet' else \
+                            (shard, set(shard.PropertiesList))
+                    if shards[Varset] is None or \
+                            Name not in shards[Varset][1]:
+                        continue
+                    shard = shards[Varset][0]
+                    self.add(Name, obj.Name, normalize_path(Path),
+                             shard.getGroupOfProperty(Name), Varset)
+
+    def add(self, Name, Object, Path, Group="", Varset=None):
+        entry = self.bindings.get(Name)
+        if entry is None:
+            entry = self.bindings[Name] = {"group": Group, "targets": []}
+            if Varset is not None and Varset != self.varset.Name:
+                entry["varset"] = Varset
+        if [Object, Path] not in entry["targets"]:
+            entry["targets"].append([Object, Path])
+        self.objects.setdefault(Object, set()).add(Name)
+
+    def targets(self, Name):
+        """Returns the [object name, path] pairs bound to Name"""
+        entry = self.bindings.get(Name)
+        return entry["targets"] if entry is not None else []
+
+    def varset_of(self, Name):
+        """Returns the VarSet (or shard) holding Name"""
+        entry = self.bindings.get(Name)
+        if entry is None or "varset" not in entry:
+            return self.varset
+        return self.doc.getObject(entry["varset"])
+
+    def group(self, Group):
+        """Returns the properties of the VarSet group Group"""
+        return [Name for Name, entry in self.bindings.items()
+                if entry["group"] == Group]
+
+    def with_placements(self, Names):
+        """Returns Names with the other properties of every placement
+        among them: the 4 properties of a placement move together"""
+        result = []
+        for Name in Names:
+            Group = [Name]
+            match = PLACEMENT_NAME.match(Name)
+            if match is not None:
+                Group = [f"{match.group(1)}{suffix}"
+                         for suffix in PLACEMENT_SUFFIXES]
+                Group = [x for x in Group if x in self.bindings] or [Name]
+            result.extend(x for x in Group if x not in result)
+        return result
+
+    def of_object(self, Object):
+        """Returns the properties some expression of Object points at"""
+        return sorted(self.objects.get(Object, ()))
+
+    def discard(self, Name, Object=None):
+        """Forgets the bindings of Name (only those of Object if given)"""
+        entry = self.bindings.get(Name)
+        if entry is None:
+            return
+        if Object is None:
+            Objects = {o for o, p in entry["targets"]}
+            del self.bindings[Name]
+        else:
+            Objects = {Object}
+            entry["targets"] = [t for t in entry["targets"] if t[0] != Object]
+            if not entry["targets"]:
+                del self.bindings[Name]
+        for o in Objects:
+            names = self.objects.get(o)
+            if names is not None:
+                names.discard(Name)
+                if not names:
+                    del self.objects[o]
+
+    def save(self):
+        """Writes the index into the hidden property of the VarSet"""
+        varset = self.varset
+        if BINDINGS_PROPERTY not in varset.PropertiesList:
+            varset.addProperty('App::PropertyString', BINDINGS_PROPERTY,
+                               "LVarset")
+            varset.setEditorMode(BINDINGS_PROPERTY, 2)  # hidden
+        setattr(varset, BINDINGS_PROPERTY,
+                json.dumps(self.bindings, separators=(",", ":")))
+
+
+class BoundNames:
+    """'name in bound' for the VarSet properties already bound: those of
+    index, and those bindings (a BindingIndex, or None) records in another
+    VarSet, e.g. moved there by rebind"""
+
+    __slots__ = ("index", "bindings")
+
+    def __init__(self, index, bindings=None):
+        self.index = index
+        self.bindings = bindings.bindings if bindings is not None else {}
+
+    def __contains__(self, name):
+        if name in self.index:
+            return True
+        entry = self.bindings.get(name)
+        return entry is not None and "varset" in entry
+
+
+@contextmanager
+def transaction(doc, name="LVarset"):
+    """One undo step; aborted if the block raises"""
+    doc.openTransaction(name)
+    try:
+        yield
+    except BaseException:
+        doc.abortTransaction()
+        raise
+    else:
+        doc.commitTransaction()
+
+
+def unbind(doc, bindings, Names, Object=None, remove_properties=True,
+           index=None):
+    """Removes the expressions bound to the VarSet properties Names (only
+    those of Object if given) and, with remove_properties, the properties
+    left without bindings. index, a VarSetIndex, is kept in step.
+
+    Runs in one transaction; the cost is the number of bindings touched.
+    Returns that number.
+    """
+    count = 0
+    with transaction(doc, "LVarset unbind"):
+        for Name in list(Names):
+            varset = bindings.varset_of(Name)
+            for o, Path in list(bindings.targets(Name)):
+                if Object is not None and o != Object:
+                    continue
+                obj = doc.getObject(o)
+                if obj is not None:
+                    obj.setExpression(Path, None)
+                count += 1
+            bindings.discard(Name, Object)
+            if remove_properties and varset is not None and \
+                    Name not in bindings.bindings:
+                varset.removeProperty(Name)
+                if index is not None:
+                    index.note_removed(varset, Name)
+        bindings.save()
+    return count
+
+
+def unbind_group(doc, bindings, Group, **kwargs):
+    """Unbinds every property of the VarSet group Group"""
+    return unbind(doc, bindings, bindings.group(Group), **kwargs)
+
+
+def unbind_object(doc, bindings, Object, **kwargs):
+    """Unbinds every expression of the object named Object"""
+    return unbind(doc, bindings, bindings.of_object(Object), Object, **kwargs)
+
+
+def rebind(doc, bindings, Names, target, index=None):
+    """Moves the VarSet properties Names, with their values, onto the
+    VarSet target and points their expressions at it.
+
+    bindings keeps the moved properties, recorded with the name of target
+    like the shards, so that the scan still sees them bound. A property of
+    a placement moves the 3 others with it. index, a VarSetIndex, is kept
+    in step. The cost is the number of bindings moved. Returns the BindingIndex of target, updated and saved.
+    """
+    moved = BindingIndex.load(doc, target, rebuild=False)
+    existing = set(target.PropertiesList)
+    with transaction(doc, "LVarset rebind"):
+        for Name in bindings.with_placements(Names):
+            entry = bindings.bindings.get(Name)
+            if entry is None:
+                continue
+            varset = bindings.varset_of(Name)
+            if Name not in existing:
+                target.addProperty(varset.getTypeIdOfProperty(Name), Name,
+                                   entry["group"])
+                existing.add(Name)
+            setattr(target, Name, getattr(varset, Name))
+            for o, Path in entry["targets"]:
+                doc.getObject(o).setExpression(Path, f"{target.Name}.{Name}")
+                moved.add(Name, o, Path, entry["group"])
+            if varset is not target:
+                varset.removeProperty(Name)
+                if index is not None:
+                    index.note_removed(varset, Name)
+            if target is bindings.varset:
+                entry.pop("varset", None)
+            else:
+                entry["varset"] = target.Name
+        bindings.save()
+        moved.save()
+    return moved
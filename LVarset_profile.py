@@ -0,0 +1,253 @@
+# LVarset_profile Copyright (c) 2025 Luca Corti
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Where the time of LVarset goes, for the bug reports.
+
+A Profiler installed with LVarset_core.set_profiler records the wall time
+of every phase (scan, UI load, list, binding, recompute...), the scan cost
+per TypeId, the slowest objects and the calls made to the expensive
+FreeCAD API. With cprofile=True a cProfile capture runs from start() to
+stop() as well. The report is printed to the FreeCAD console and can be
+saved as JSON; like LVarset_core this module imports neither Qt nor
+FreeCAD at load time.
+"""
+
+import cProfile
+import heapq
+import io
+import json
+import platform
+import pstats
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from time import perf_counter
+
+# FreeCAD calls counted while an object is scanned: the ones that copy
+# data out of C++ or walk the properties
+PROBED_CALLS = frozenset((
+    'PropertiesList', 'getPropertyStatus', 'getTypeIdOfProperty',
+    'Constraints', 'getDatum', 'ExpressionEngine'
+))
+
+
+class ProbeObject:
+    """Stands for a DocumentObject during its scan, counting the
+    PROBED_CALLS made on it; everything else goes straight through"""
+
+    __slots__ = ("_obj", "_calls")
+
+    def __init__(self, obj, calls):
+        object.__setattr__(self, "_obj", obj)
+        object.__setattr__(self, "_calls", calls)
+
+    def __getattr__(self, name):
+        if name in PROBED_CALLS:
+            self._calls[name] += 1
+        return getattr(self._obj, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._obj, name, value)
+
+
+class Profiler:
+    """Phase timings, scan costs and API call counts of a session.
+
+    slowest is how many of the slowest objects are kept.
+    """
+
+    def __init__(self, cprofile=False, slowest=20):
+        self.phases = {}  # name -> [seconds, times]
+        self.running = {}  # name -> start of a phase begun with begin()
+        self.types = {}  # TypeId -> [seconds, objects, candidates]
+        self.calls = Counter()  # FreeCAD API -> calls
+        self.slowest = []  # heap of (seconds, object Name, TypeId)
+        self.keep = slowest
+        self.meta = {}
+        self.profile = cProfile.Profile() if cprofile else None
+        self.started = None
+        self.elapsed = 0.0
+
+    # --------------------------------------------
+    #                  SESSION
+    # --------------------------------------------
+
+    def start(self):
+        self.started = perf_counter()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+        if self.started is not None:
+            self.elapsed += perf_counter() - self.started
+            self.started = None
+        for name in list(self.running):
+            self.end(name)
+
+    # --------------------------------------------
+    #                   PHASES
+    # --------------------------------------------
+
+    def add(self, name, seconds):
+        entry = self.phases.get(name)
+        if entry is None:
+            entry = self.phases[name] = [0.0, 0]
+        entry[0] += seconds
+        entry[1] += 1
+
+    @contextmanager
+    def phase(self, name):
+        """Times the block as the phase name (added up if repeated)"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def begin(self, name):
+        """Opens the phase name, for the work spread over time slices"""
+        self.running[name] = perf_counter()
+
+    def end(self, name):
+        start = self.running.pop(name, None)
+        if start is not None:
+            self.add(name, perf_counter() - start)
+
+    def count(self, name, n=1):
+        if n:
+            self.calls[name] += n
+
+    # --------------------------------------------
+    #                    SCAN
+    # --------------------------------------------
+
+    def scan_object(self, scan, XObject, bound, schemas):
+        """Runs scan (LVarset_core.scan_object) on XObject, timing it and
+        counting its API calls; returns the list of Candidates"""
+        start = perf_counter()
+        Candidates = list(scan(ProbeObject(XObject, self.calls),
+                               bound, schemas))
+        seconds = perf_counter() - start
+        type_id = XObject.TypeId
+        entry = self.types.get(type_id)
+        if entry is None:
+            entry = self.types[type_id] = [0.0, 0, 0]
+        entry[0] += seconds
+        entry[1] += 1
+        entry[2] += len(Candidates)
+        item = (seconds, XObject.Name, type_id)
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+        return Candidates
+
+    # --------------------------------------------
+    #                   REPORT
+    # --------------------------------------------
+
+    def report(self, top=25):
+        """Returns the report as a dict, ready for json"""
+        data = {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "meta": self.meta,
+            "total_seconds": round(self.elapsed, 6),
+            "phases": {
+                name: {"seconds": round(seconds, 6), "times": times}
+                for name, (seconds, times) in sorted(
+                    self.phases.items(), key=lambda x: -x[1][0])},
+            "types": {
+                type_id: {"seconds": round(seconds, 6), "objects": objects,
+                          "candidates": candidates,
+                          "us_per_object": round(1e6 * seconds / objects, 1)}
+                for type_id, (seconds, objects, candidates) in sorted(
+                    self.types.items(), key=lambda x: -x[1][0])},
+            "calls": dict(self.calls.most_common()),
+            "slowest": [
+                {"object": Name, "type": type_id,
+                 "seconds": round(seconds, 6)}
+                for seconds, Name, type_id in sorted(self.slowest,
+                                                     reverse=True)],
+        }
+        if self.profile is not None:
+            data["cprofile"] = self.profile_rows(top)
+        return data
+
+    def profile_rows(self, top=25):
+        """The top functions of the cProfile capture, by cumulative time"""
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        rows = []
+        for (file, line, function), (cc, nc, tt, ct, callers) in sorted(
+                stats.stats.items(), key=lambda x: -x[1][3])[:top]:
+            rows.append({"function": f"{file}:{line}({function})",
+                         "calls": nc, "tottime": round(tt, 6),
+                         "cumtime": round(ct, 6)})
+        return rows
+
+    def format(self, data=None):
+        """Returns the report as text"""
+        if data is None:
+            data = self.report()
+        lines = [f"LVarset profile, {data['total_seconds']:.3f} s"]
+        for key, value in data["meta"].items():
+            lines.append(f"  {key}: {value}")
+        lines.append("phases:")
+        for name, x in data["phases"].items():
+            lines.append(f"  {name:24} {x['seconds']:10.4f} s"
+                         f"  x{x['times']}")
+        if data["types"]:
+            lines.append("scan per TypeId:")
+            for type_id, x in data["types"].items():
+                lines.append(f"  {type_id:32} {x['seconds']:10.4f} s"
+                             f" {x['objects']:7} objects"
+                             f" {x['us_per_object']:10.1f} us/object")
+        if data["calls"]:
+            lines.append("FreeCAD calls:")
+            for name, n in data["calls"].items():
+                lines.append(f"  {name:24} {n:10}")
+        if data["slowest"]:
+            lines.append("slowest objects:")
+            for x in data["slowest"]:
+                lines.append(f"  {x['object']:32} {x['type']:32}"
+                             f" {1e3 * x['seconds']:8.2f} ms")
+        for x in data.get("cprofile", ()):
+            if x is data["cprofile"][0]:
+                lines.append("cProfile, by cumulative time:")
+            lines.append(f"  {x['cumtime']:10.4f} {x['tottime']:10.4f}"
+                         f" {x['calls']:8}  {x['function']}")
+        return "\n".join(lines) + "\n"
+
+    def print_report(self, data=None):
+        """Prints the report to the FreeCAD console (stdout without
+        FreeCAD)"""
+        text = self.format(data)
+        try:
+            import FreeCAD
+            FreeCAD.Console.PrintMessage(text)
+        except ImportError:
+            print(text, end="")
+
+    def save(self, path, data=None):
+        """Writes the report to path as JSON, returns the report"""
+        if data is None:
+            data = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return data
@@ -0,0 +1,286 @@
+# LVarset_ui Copyright (c) 2025 Luca Corti
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""LVarset.ui compiled to Python, so that the macro does not parse the XML
+through QUiLoader at every launch.
+
+Made as pyside6-uic LVarset.ui would, importing the PySide of FreeCAD.
+After editing LVarset.ui in the Designer compile it again and update
+UI_SHA1; until then the macro notices the difference and loads
+LVarset.ui as before.
+"""
+
+from PySide import QtCore, QtWidgets
+
+# sha1 of LVarset.ui (line ends as \n) this module has been compiled from
+UI_SHA1 = "9f916fb33ac41e6e917274e6a1041da3a7b23ed8"
+
+
+class Ui_Form(object):
+    def setupUi(self, Form):
+        if not Form.objectName():
+            Form.setObjectName(u"Form")
+        Form.resize(553, 700)
+        sizePolicy = QtWidgets.QSizePolicy(
+            QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(Form.sizePolicy().hasHeightForWidth())
+        Form.setSizePolicy(sizePolicy)
+        Form.setMinimumSize(QtCore.QSize(500, 700))
+        Form.setMaximumSize(QtCore.QSize(553, 700))
+        Form.setStyleSheet(
+            "QListView {\n"
+            "\tbackground-color: rgb(211, 211, 211) ;/*   */\n"
+            "\tmargin:0px;\n"
+            "\tcolor: black;\n"
+            "\tfont-weight: bold;\n"
+            "}\n"
+            "\n"
+            "QListView::item {\n"
+            "\tpadding: 0px;      spazio interno di ogni elemento */\n"
+            "}\n"
+            "\n"
+            "QListView::item:hover {\n"
+            "    background-color: rgb(200, 200, 200) ; \n"
+            "\tcolor: black;\n"
+            "}  \n"
+            "\n"
+            "QListView::item:selected {\n"
+            "    background-color:  rgb(230, 230, 230) ; \n"
+            "\tcolor: black;\n"
+            "}  \n"
+            "\n"
+            "QListView::indicator {\n"
+            "    width: 12px;\n"
+            "    height: 10px;\n"
+            "    border: 1px solid black;\n"
+            "    background: white;\n"
+            "    margin: 0px;\n"
+            "}\n"
+            "\n"
+            "QListView::indicator:checked {\n"
+            "    background: black;\n"
+            "}\n"
+            "\n"
+            "\n"
+            "QComboBox {\n"
+            "   background-color: rgb(170, 170, 170) ;\n"
+            "    font: 11pt \"Times New Roman\";\n"
+            "    color: black;\n"
+            "\tfont-weight: bold;\n"
+            "    padding: 0px;\n"
+            "\tborder-radius: 4px;\n"
+            "\ttext-align: center; \n"
+            "}\n"
+            "QComboBox::item {\n"
+            "\ttext-align: center; \n"
+            "\tcolor: black;\n"
+            "}\n"
+            "\n"
+            "\n"
+            "QComboBox QAbstractItemView {\n"
+            "    background-color: rgb(185, 185, 185) ;  /* arancio  */\n"
+            "    color: black ;                          /* testo nero */\n"
+            "    border: 1px solid rgb(162, 128, 102);  \n"
+            "    selection-background-color: rgb(168, 168, 168) ;\n"
+            "    selection-color:  black ;        \n"
+            "}\n"
+            "\n"
+            "QPushButton {\n"
+            "\tfont: 10pt \"Times New Roman\";\n"
+            "\tbackground-color: rgb(141, 141, 141) ; /* luce (alto/sinistra) */\n"
+            "\tborder-top: 2px solid  #ffcaa1  ;          /* luce (alto/sinistra) */\n"
+            "\tborder-left: 2px solid #ffcaa1 ;\n"
+            "\tborder-right: 2px solid #554336  ;        /* ombra (basso/destra) */\n"
+            "\tborder-bottom: 2px solid #554336  ;\n"
+            "\tborder-radius: 4px;\n"
+            "\tpadding :4px;\n"
+            "\tcolor: black;\n"
+            "\tfont-weight: bold;\n"
+            "}\n"
+            "\n"
+            "QPushButton:hover {\n"
+            "    background-color:rgb(106, 106, 106) ;      /*        leggermente più scuro */\n"
+            "}\n"
+            "\n"
+            "QPushButton:pressed {\n"
+            "    background-color: rgb(54, 54, 54); /*#c0c0c0;              più scuro */\n"
+            "    border-top: 2px solid #707070;          /* inverti luce/ombra */\n"
+            "    border-left: 2px solid #707070;\n"
+            "    border-right: 2px solid #ffffff;\n"
+            "    border-bottom: 2px solid #ffffff;\n"
+            "    padding-top: 5px;                       /* piccolo spostamento “affossato” */\n"
+            "    padding-left: 5px;\n"
+            "}\n"
+            "\n"
+            "QLabel  {\n"
+            "\tfont: 10pt \"Times New Roman\";\n"
+            "\tfont-weight: bold;\n"
+            "\tbackground-color: rgb(211, 211, 211) ;\n"
+            "\tmargin:0px;\n"
+            "\tcolor: black ;\n"
+            "\tqproperty-alignment: 'AlignCenter';\n"
+            "}\n"
+            "\n")
+        self.horizontalLayout_3 = QtWidgets.QHBoxLayout(Form)
+        self.horizontalLayout_3.setObjectName(u"horizontalLayout_3")
+        self.verticalLayout = QtWidgets.QVBoxLayout()
+        self.verticalLayout.setObjectName(u"verticalLayout")
+        self.verticalLayout.setSizeConstraint(
+            QtWidgets.QLayout.SetMaximumSize)
+        self.OBjectsLabel = QtWidgets.QLabel(Form)
+        self.OBjectsLabel.setObjectName(u"OBjectsLabel")
+        sizePolicy1 = QtWidgets.QSizePolicy(
+            QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy1.setHorizontalStretch(0)
+        sizePolicy1.setVerticalStretch(0)
+        sizePolicy1.setHeightForWidth(
+            self.OBjectsLabel.sizePolicy().hasHeightForWidth())
+        self.OBjectsLabel.setSizePolicy(sizePolicy1)
+        self.OBjectsLabel.setStyleSheet(u"")
+
+        self.verticalLayout.addWidget(self.OBjectsLabel)
+
+        self.FilterEdit = QtWidgets.QLineEdit(Form)
+        self.FilterEdit.setObjectName(u"FilterEdit")
+        self.FilterEdit.setClearButtonEnabled(True)
+
+        self.verticalLayout.addWidget(self.FilterEdit)
+
+        self.ObjCombo = QtWidgets.QComboBox(Form)
+        self.ObjCombo.setObjectName(u"ObjCombo")
+        sizePolicy.setHeightForWidth(
+            self.ObjCombo.sizePolicy().hasHeightForWidth())
+        self.ObjCombo.setSizePolicy(sizePolicy)
+        self.ObjCombo.setMinimumSize(QtCore.QSize(0, 35))
+        self.ObjCombo.setMaximumSize(QtCore.QSize(16777215, 40))
+        self.ObjCombo.setEditable(True)
+        self.ObjCombo.setMaxVisibleItems(21)
+        self.ObjCombo.setFrame(False)
+
+        self.verticalLayout.addWidget(
+            self.ObjCombo, 0, QtCore.Qt.AlignVCenter)
+
+        self.PropertiesLabel = QtWidgets.QLabel(Form)
+        self.PropertiesLabel.setObjectName(u"PropertiesLabel")
+        sizePolicy1.setHeightForWidth(
+            self.PropertiesLabel.sizePolicy().hasHeightForWidth())
+        self.PropertiesLabel.setSizePolicy(sizePolicy1)
+        self.PropertiesLabel.setStyleSheet(u"")
+
+        self.verticalLayout.addWidget(self.PropertiesLabel)
+
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName(u"horizontalLayout")
+        self.horizontalLayout.setSizeConstraint(
+            QtWidgets.QLayout.SetMaximumSize)
+        self.DeSelAll = QtWidgets.QPushButton(Form)
+        self.DeSelAll.setObjectName(u"DeSelAll")
+        sizePolicy2 = QtWidgets.QSizePolicy(
+            QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        sizePolicy2.setHorizontalStretch(0)
+        sizePolicy2.setVerticalStretch(0)
+        sizePolicy2.setHeightForWidth(
+            self.DeSelAll.sizePolicy().hasHeightForWidth())
+        self.DeSelAll.setSizePolicy(sizePolicy2)
+        self.DeSelAll.setStyleSheet(u"")
+
+        self.horizontalLayout.addWidget(self.DeSelAll)
+
+        self.SelAll = QtWidgets.QPushButton(Form)
+        self.SelAll.setObjectName(u"SelAll")
+        sizePolicy2.setHeightForWidth(
+            self.SelAll.sizePolicy().hasHeightForWidth())
+        self.SelAll.setSizePolicy(sizePolicy2)
+        self.SelAll.setStyleSheet(u"")
+
+        self.horizontalLayout.addWidget(self.SelAll)
+
+        self.verticalLayout.addLayout(self.horizontalLayout)
+
+        self.ListProperties = QtWidgets.QListView(Form)
+        self.ListProperties.setObjectName(u"ListProperties")
+        self.ListProperties.setStyleSheet(u"")
+        self.ListProperties.setFrameShadow(QtWidgets.QFrame.Plain)
+
+        self.verticalLayout.addWidget(self.ListProperties)
+
+        self.horizontalLayout_2 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_2.setObjectName(u"horizontalLayout_2")
+        self.horizontalLayout_2.setSizeConstraint(
+            QtWidgets.QLayout.SetMaximumSize)
+        self.Exit = QtWidgets.QPushButton(Form)
+        self.Exit.setObjectName(u"Exit")
+        sizePolicy2.setHeightForWidth(
+            self.Exit.sizePolicy().hasHeightForWidth())
+        self.Exit.setSizePolicy(sizePolicy2)
+        self.Exit.setStyleSheet(u"")
+
+        self.horizontalLayout_2.addWidget(self.Exit)
+
+        self.CompileVars = QtWidgets.QPushButton(Form)
+        self.CompileVars.setObjectName(u"CompileVars")
+        sizePolicy2.setHeightForWidth(
+            self.CompileVars.sizePolicy().hasHeightForWidth())
+        self.CompileVars.setSizePolicy(sizePolicy2)
+        self.CompileVars.setStyleSheet(u"")
+
+        self.horizontalLayout_2.addWidget(self.CompileVars)
+
+        self.verticalLayout.addLayout(self.horizontalLayout_2)
+
+        self.horizontalLayout_4 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_4.setObjectName(u"horizontalLayout_4")
+        self.Progress = QtWidgets.QProgressBar(Form)
+        self.Progress.setObjectName(u"Progress")
+        sizePolicy1.setHeightForWidth(
+            self.Progress.sizePolicy().hasHeightForWidth())
+        self.Progress.setSizePolicy(sizePolicy1)
+        self.Progress.setValue(0)
+
+        self.horizontalLayout_4.addWidget(self.Progress)
+
+        self.Cancel = QtWidgets.QPushButton(Form)
+        self.Cancel.setObjectName(u"Cancel")
+
+        self.horizontalLayout_4.addWidget(self.Cancel)
+
+        self.verticalLayout.addLayout(self.horizontalLayout_4)
+
+        self.horizontalLayout_3.addLayout(self.verticalLayout)
+
+        QtWidgets.QWidget.setTabOrder(self.ObjCombo, self.SelAll)
+
+        self.retranslateUi(Form)
+
+        self.ObjCombo.setCurrentIndex(-1)
+
+        QtCore.QMetaObject.connectSlotsByName(Form)
+    # setupUi
+
+    def retranslateUi(self, Form):
+        translate = QtCore.QCoreApplication.translate
+        Form.setWindowTitle(translate("Form", u"Form", None))
+        self.OBjectsLabel.setText(translate("Form", u"Objects", None))
+        self.FilterEdit.setPlaceholderText(
+            translate("Form", u"Filter objects and properties", None))
+        self.PropertiesLabel.setText(translate("Form", u"Proprieties", None))
+        self.DeSelAll.setText(translate("Form", u"De Select ALL", None))
+        self.SelAll.setText(translate("Form", u"Select ALL", None))
+        self.Exit.setText(translate("Form", u"Exit", None))
+        self.CompileVars.setText(translate("Form", u"Create Varset", None))
+        self.Cancel.setText(translate("Form", u"Cancel", None))
+    # retranslateUi
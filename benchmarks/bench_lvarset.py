@@ -0,0 +1,285 @@
+# LVarset benchmarks Copyright (c) 2025 Luca Corti
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Times LVarset on synthetic documents, without FreeCAD.
+
+The documents are built with the fake FreeCAD module of benchmarks/fake
+(see synthetic.py) and every size goes through the phases of the macro:
+
+    scan        scan_document, the extraction loop
+    cache       ScanCache, full scan then a refresh with nothing changed
+    search      SearchIndex of the candidates and a few queries
+    window      Window1 up to its first paint (offscreen Qt)
+    slices      the scan in time slices started by the first paint
+    fill        FillForm, the ComboBox and the first list
+    proplist    UpdatePropList, mean over --ui-objects objects
+    bind        build_plan and apply_plan of every candidate
+    resync      sync_plan of the bound document, expected empty
+
+usage:
+    python benchmarks/bench_lvarset.py --sizes 100,1000,10000,100000
+        -o bench.json [--constraints 20 --driven 0.2 ...] [--no-ui]
+
+every phase reports its seconds, the microseconds per object and the calls
+of the expensive FreeCAD API it made; growth is how much the time per
+object grew from the size before, about 1 for a linear phase and about the
+size ratio for a quadratic one. The UI phases are skipped when neither
+PySide6 nor PySide2 can be imported.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+HERE = Path(__file__).parent
+# the fake FreeCAD (and its PySide) must win over a real one
+sys.path.insert(0, str(HERE / "fake"))
+sys.path.insert(1, str(HERE))
+sys.path.insert(2, str(HERE.parent))
+
+import FreeCAD  # noqa: E402
+from LVarset_core import (  # noqa: E402
+    BindingIndex, CandidateStore, ScanCache, SearchIndex, apply_plan,
+    build_plan, get_varset, make_index, scan_document, sync_plan)
+from synthetic import SPEC_FIELDS, DocumentSpec, make_document  # noqa: E402
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+# queries run by the search phase: narrow, broad, incremental
+SEARCH_QUERIES = ("p", "pa", "pad", "pad1", "length", "dim", "zzz")
+
+
+# ------------------------------------------------
+#                    TIMING
+# ------------------------------------------------
+
+
+class Phase:
+    """Times a block and counts the FreeCAD calls made inside it"""
+
+    def __init__(self, results, name, objects):
+        self.results = results
+        self.name = name
+        self.objects = objects
+
+    def __enter__(self):
+        gc.collect()
+        self.calls = FreeCAD.calls.copy()
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        seconds = perf_counter() - self.start
+        calls = FreeCAD.calls - self.calls
+        if kind is None:
+            self.results[self.name] = {
+                "seconds": round(seconds, 6),
+                "us_per_object": round(1e6 * seconds / self.objects, 3),
+                "calls": dict(sorted(calls.items())),
+            }
+        return False
+
+
+def load_qt():
+    """Returns the macro module and a QApplication, None if no Qt"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide import QtWidgets
+    except ImportError:
+        return None, None
+    import LVarset_0_1_Beta as macro
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    return macro, app
+
+
+# ------------------------------------------------
+#                   ONE SIZE
+# ------------------------------------------------
+
+
+def run_size(spec, macro=None, app=None, ui_objects=200):
+    """Runs every phase on a new document made after spec, returns
+    {phase: result}"""
+    results = {}
+    n = spec.objects
+
+    start = perf_counter()
+    doc = make_document(spec, f"Bench{n}")
+    results["generate"] = {"seconds": round(perf_counter() - start, 6)}
+    varset = get_varset(doc)
+
+    with Phase(results, "scan", n):
+        candidates = list(scan_document(doc, varset))
+    results["scan"]["candidates"] = len(candidates)
+
+    with Phase(results, "cache", n):
+        cache = ScanCache(doc, varset)
+        cache.attach()
+        cache.refresh()
+        cache.refresh()
+
+    with Phase(results, "search", n):
+        store = CandidateStore(candidates)
+        search = SearchIndex(store)
+        for query in SEARCH_QUERIES:
+            search.search(query)
+
+    if macro is not None:
+        run_ui(results, doc, varset, cache, macro, app, ui_objects)
+
+    index = make_index(doc, varset)
+    bindings = BindingIndex.load(doc, varset)
+    with Phase(results, "bind", n):
+        plan = build_plan(candidates, index)
+        apply_plan(doc, index, plan, bindings=bindings)
+    results["bind"]["properties"] = len(plan.properties)
+    results["bind"]["expressions"] = len(plan.expressions)
+
+    with Phase(results, "resync", n):
+        wanted = scan_document(doc, varset, index, include_bound=True)
+        plan = sync_plan(doc, index, wanted, bindings)
+    results["resync"]["changes"] = repr(plan) if plan else None
+
+    cache.detach()
+    FreeCAD.closeDocument(doc.Name)
+    return results
+
+
+def run_ui(results, doc, varset, cache, macro, app, ui_objects):
+    n = len(doc.Objects)
+    with Phase(results, "window", n):
+        window = macro.Window1(doc, varset, cache)
+        window.Launch()
+        while window.FirstPaint is None:
+            app.processEvents()
+    results["window"]["first_paint_ms"] = round(1e3 * window.FirstPaint, 3)
+    # the scan in time slices started by the first paint, and FillForm
+    with Phase(results, "slices", n):
+        while window.Runner is not None or window.Search is None:
+            app.processEvents()
+    with Phase(results, "fill", n):
+        window.FillForm()
+        app.processEvents()
+    count = min(ui_objects, window.ObjComb.count())
+    with Phase(results, "proplist", max(count, 1)):
+        for ii in range(count):
+            window.ObjComb.setCurrentIndex(ii)  # runs UpdatePropList
+    results["proplist"]["objects"] = count
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+
+# ------------------------------------------------
+#                    REPORT
+# ------------------------------------------------
+
+
+def add_growth(runs):
+    """Adds to every phase the growth of its time per object from the
+    size before"""
+    for before, after in zip(runs, runs[1:]):
+        for name, result in after["phases"].items():
+            previous = before["phases"].get(name)
+            if not previous or "us_per_object" not in result or \
+                    not previous["us_per_object"]:
+                continue
+            result["growth"] = round(
+                result["us_per_object"] / previous["us_per_object"], 2)
+
+
+def print_run(run):
+    print(f"-- {run['objects']} objects")
+    for name, result in run["phases"].items():
+        line = f"   {name:10} {result['seconds']:10.4f}s"
+        if "us_per_object" in result:
+            line += f" {result['us_per_object']:10.2f} us/object"
+        if "growth" in result:
+            line += f"  x{result['growth']}"
+        print(line)
+
+
+def parse_mix(text):
+    """'Sketcher::SketchObject=4,PartDesign::Pad=2' -> dict"""
+    mix = {}
+    for item in text.split(","):
+        type_id, _, weight = item.partition("=")
+        mix[type_id.strip()] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bench_lvarset", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated object counts")
+    parser.add_argument("--mix", default=None, type=parse_mix,
+                        help='TypeId mix, e.g. "Sketcher::SketchObject=4,'
+                             'PartDesign::Pad=2"')
+    for name in ("properties", "noise", "constraints", "body_size", "seed"):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int,
+                            default=SPEC_FIELDS[name])
+    for name in ("nondatum", "driven", "named", "readonly"):
+        parser.add_argument(f"--{name}", type=float,
+                            default=SPEC_FIELDS[name])
+    parser.add_argument("--ui-objects", type=int, default=200,
+                        help="objects shown by the proplist phase")
+    parser.add_argument("--no-ui", action="store_true",
+                        help="skip the Qt phases")
+    parser.add_argument("-o", "--output", default=None,
+                        help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    macro = app = None
+    if not args.no_ui:
+        macro, app = load_qt()
+        if macro is None:
+            print("no PySide6/PySide2: the UI phases are skipped")
+
+    fields = {name: getattr(args, name) for name in SPEC_FIELDS
+              if name not in ("objects", "mix")}
+    if args.mix is not None:
+        fields["mix"] = args.mix
+    runs = []
+    for size in (int(x) for x in args.sizes.split(",")):
+        spec = DocumentSpec(objects=size, **fields)
+        FreeCAD.calls.clear()
+        runs.append({"objects": size,
+                     "phases": run_size(spec, macro, app, args.ui_objects)})
+        add_growth(runs)
+        print_run(runs[-1])
+
+    if args.output:
+        report = {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "ui": macro is not None,
+            "spec": DocumentSpec(**fields).to_dict(),
+            "runs": runs,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+# Fake FreeCAD for the LVarset benchmarks Copyright (c) 2025 Luca Corti
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Just enough of the FreeCAD module to run LVarset without FreeCAD.
+
+The documents live in memory and nothing is ever computed, but the costs
+that matter to LVarset are kept: PropertiesList, Constraints and
+ExpressionEngine build a new list at every access, as the C++ binding does,
+and getDatum raises for the constraints without a datum. Every call of the
+expensive API is counted in calls, so that a benchmark can tell a slow
+path from a path called too often.
+"""
+
+from collections import Counter
+
+ActiveDocument = None
+
+calls = Counter()  # API name -> number of calls
+
+_documents = {}
+_observers = []
+
+
+# ------------------------------------------------
+#                   BASE TYPES
+# ------------------------------------------------
+
+
+class Quantity:
+    __slots__ = ("Value", "Unit")
+
+    def __init__(self, value=0.0, unit="mm"):
+        self.Value = float(value)
+        self.Unit = unit
+
+    def __float__(self):
+        return self.Value
+
+    def __str__(self):
+        return f"{self.Value} {self.Unit}" if self.Unit else f"{self.Value}"
+
+
+class Vector:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+
+class Rotation:
+    __slots__ = ("Angle",)
+
+    def __init__(self, angle=0.0):
+        self.Angle = float(angle)  # radians
+
+
+class Placement:
+    __slots__ = ("Base", "Rotation")
+
+    def __init__(self, base=None, angle=0.0):
+        self.Base = base if base is not None else Vector()
+        self.Rotation = Rotation(angle)
+
+
+class Constraint:
+    """A sketch constraint; Value is None for the types without datum"""
+
+    __slots__ = ("Type", "Name", "Value", "Driving")
+
+    def __init__(self, Type, Name="", Value=None, Driving=True):
+        self.Type = Type
+        self.Name = Name
+        self.Value = Value
+        self.Driving = Driving
+
+
+class Console:
+    @staticmethod
+    def PrintMessage(text):
+        print(text, end="")
+
+    @staticmethod
+    def PrintWarning(text):
+        print(text, end="")
+
+    @staticmethod
+    def PrintError(text):
+        print(text, end="")
+
+
+# ------------------------------------------------
+#                 DOCUMENT OBJECT
+# ------------------------------------------------
+
+# property type given to the values that do not say it
+_VALUE_TYPES = (
+    (Placement, "App::PropertyPlacement"),
+    (Quantity, "App::PropertyLength"),
+    (list, "Sketcher::PropertyConstraintList"),
+    (bool, "App::PropertyBool"),
+    (int, "App::PropertyInteger"),
+    (float, "App::PropertyFloat"),
+    (str, "App::PropertyString"),
+)
+
+_DEFAULTS = {
+    "App::PropertyAngle": lambda: Quantity(0.0, "deg"),
+    "App::PropertyLength": lambda: Quantity(0.0, "mm"),
+    "App::PropertyDistance": lambda: Quantity(0.0, "mm"),
+    "App::PropertyFloat": float,
+    "App::PropertyInteger": int,
+    "App::PropertyBool": bool,
+    "App::PropertyString": str,
+}
+
+_INTERNAL = frozenset((
+    "_props", "_types", "_status", "_groups", "_expressions", "TypeId",
+    "Name", "Document", "InList", "OutList", "parent"))
+
+
+class DocumentObject:
+    def __init__(self, doc, type_id, name):
+        sa = object.__setattr__
+        sa(self, "_props", {"Label": name, "Label2": "",
+                            "Visibility": True})
+        sa(self, "_types", {"Label": "App::PropertyString",
+                            "Label2": "App::PropertyString",
+                            "Visibility": "App::PropertyBool"})
+        sa(self, "_status", {})
+        sa(self, "_groups", {})
+        sa(self, "_expressions", {})
+        sa(self, "TypeId", type_id)
+        sa(self, "Name", name)
+        sa(self, "Document", doc)
+        sa(self, "InList", [])
+        sa(self, "OutList", [])
+        sa(self, "parent", None)
+
+    def __repr__(self):
+        return f"<{self.TypeId} object {self.Name}>"
+
+    def __getattr__(self, name):
+        props = object.__getattribute__(self, "_props")
+        if name in props:
+            return props[name]
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name in _INTERNAL:
+            object.__setattr__(self, name, value)
+            return
+        props = self._props
+        if name not in props:
+            raise AttributeError(name)
+        current = props[name]
+        if isinstance(current, Quantity) and not isinstance(value, Quantity):
+            value = Quantity(value, current.Unit)
+        props[name] = value
+        _notify("slotChangedObject", self, name)
+
+    # properties
+
+    def set(self, name, value, type_id=None, status=()):
+        """Adds or overwrites a static property, without notifications"""
+        self._props[name] = value
+        if type_id is None:
+            type_id = next(t for cls, t in _VALUE_TYPES
+                           if isinstance(value, cls))
+        self._types[name] = type_id
+        if status:
+            self._status[name] = list(status)
+
+    @property
+    def PropertiesList(self):
+        calls["PropertiesList"] += 1
+        return list(self._props)
+
+    def getPropertyStatus(self, name):
+        calls["getPropertyStatus"] += 1
+        return list(self._status.get(name, ()))
+
+    def getTypeIdOfProperty(self, name):
+        calls["getTypeIdOfProperty"] += 1
+        return self._types[name]
+
+    def getGroupOfProperty(self, name):
+        return self._groups.get(name, "Base")
+
+    def addProperty(self, type_id, name, group="", doc=""):
+        calls["addProperty"] += 1
+        if name in self._props:
+            raise NameError(f"{self.Name} already has {name}")
+        self._props[name] = _DEFAULTS.get(type_id, float)()
+        self._types[name] = type_id
+        self._groups[name] = group
+        _notify("slotAppendDynamicProperty", self, name)
+        return self
+
+    def removeProperty(self, name):
+        calls["removeProperty"] += 1
+        del self._props[name]
+        del self._types[name]
+        self._groups.pop(name, None)
+        _notify("slotRemoveDynamicProperty", self, name)
+        return True
+
+    def setEditorMode(self, name, mode):
+        pass
+
+    # expressions
+
+    @property
+    def ExpressionEngine(self):
+        calls["ExpressionEngine"] += 1
+        return [(f".{Path}", Expression)
+                for Path, Expression in self._expressions.items()]
+
+    def setExpression(self, path, expression):
+        calls["setExpression"] += 1
+        if expression is None:
+            self._expressions.pop(path, None)
+        else:
+            self._expressions[path] = expression
+
+    # document structure
+
+    def getParentGeoFeatureGroup(self):
+        return self.parent
+
+    def touch(self):
+        pass
+
+    def recompute(self):
+        calls["object.recompute"] += 1
+        return True
+
+    # sketch API
+
+    @property
+    def Constraints(self):
+        calls["Constraints"] += 1
+        return list(self._props["Constraints"])
+
+    @property
+    def ConstraintCount(self):
+        return len(self._props["Constraints"])
+
+    def getDatum(self, index):
+        calls["getDatum"] += 1
+        value = self._props["Constraints"][index].Value
+        if value is None:
+            raise ValueError("Constraint does not have a datum")
+        return Quantity(value)
+
+
+# ------------------------------------------------
+#                    DOCUMENT
+# ------------------------------------------------
+
+
+class Document:
+    def __init__(self, name="Unnamed"):
+        self.Name = name
+        self.Label = name
+        self.FileName = ""
+        self.RecomputesFrozen = False
+        self.Transacting = False
+        self._objects = {}
+        self._suffixes = {}  # Name -> last number given to it
+
+    def __repr__(self):
+        return f"<Document {self.Name}>"
+
+    @property
+    def Objects(self):
+        return list(self._objects.values())
+
+    def getObject(self, name):
+        return self._objects.get(name)
+
+    def findObjects(self, Type=None):
+        calls["findObjects"] += 1
+        return [obj for obj in self._objects.values()
+                if Type is None or obj.TypeId == Type]
+
+    def addObject(self, type_id, name=None):
+        base = name or type_id.split("::")[-1]
+        name, n = base, self._suffixes.get(base, 0)
+        while name in self._objects:
+            n += 1
+            name = f"{base}{n:03d}"
+        self._suffixes[base] = n
+        obj = DocumentObject(self, type_id, name)
+        if type_id != "App::VarSet":
+            obj.set("Placement", Placement())
+        self._objects[name] = obj
+        _notify("slotCreatedObject", obj)
+        return obj
+
+    def removeObject(self, name):
+        obj = self._objects.pop(name)
+        _notify("slotDeletedObject", obj)
+
+    def recompute(self, objs=None):
+        calls["recompute"] += 1
+        calls["recompute.objects"] += \
+            len(self._objects) if objs is None else len(objs)
+        return 0
+
+    def openTransaction(self, name=""):
+        self.Transacting = True
+
+    def commitTransaction(self):
+        self.Transacting = False
+
+    def abortTransaction(self):
+        self.Transacting = False
+
+    def save(self):
+        pass
+
+    def saveAs(self, path):
+        self.FileName = str(path)
+
+
+# ------------------------------------------------
+#                 MODULE FUNCTIONS
+# ------------------------------------------------
+
+
+def newDocument(name="Unnamed"):
+    global ActiveDocument
+    base, n = name, 0
+    while name in _documents:
+        n += 1
+        name = f"{base}{n}"
+    doc = _documents[name] = ActiveDocument = Document(name)
+    return doc
+
+
+def getDocument(name):
+    return _documents[name]
+
+
+def listDocuments():
+    return dict(_documents)
+
+
+def closeDocument(name):
+    global ActiveDocument
+    doc = _documents.pop(name, None)
+    if doc is not None:
+        _notify("slotDeletedDocument", doc)
+    if ActiveDocument is doc:
+        ActiveDocument = None
+
+
+def openDocument(path):
+    raise OSError(f"the fake FreeCAD cannot read {path}")
+
+
+def addDocumentObserver(observer):
+    _observers.append(observer)
+
+
+def removeDocumentObserver(observer):
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def _notify(slot, *args):
+    for observer in list(_observers):
+        method = getattr(observer, slot, None)
+        if method is not None:
+            method(*args)
@@ -0,0 +1,21 @@
+# Fake FreeCAD PySide shim Copyright (c) 2025 Luca Corti
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""The 'PySide' module FreeCAD provides, over PySide6 or PySide2"""
+
+try:
+    from PySide6 import QtCore, QtGui, QtUiTools, QtWidgets  # noqa: F401
+except ImportError:
+    from PySide2 import QtCore, QtGui, QtUiTools, QtWidgets  # noqa: F401
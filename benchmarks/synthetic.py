@@ -0,0 +1,134 @@
+# LVarset synthetic documents Copyright (c) 2025 Luca Corti
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Builds documents of the fake FreeCAD module for the benchmarks.
+
+The objects are spread over Bodies, every Pad/Pocket depends on the
+sketch before it, and the sketches carry a mix of datum, non-datum,
+named and Driven (reference) constraints, so that every branch of the
+scan is taken.
+"""
+
+import random
+
+import FreeCAD
+
+# TypeId -> weight, the default mix of a PartDesign model
+DEFAULT_MIX = {
+    "Sketcher::SketchObject": 4,
+    "PartDesign::Pad": 2,
+    "PartDesign::Pocket": 1,
+    "PartDesign::Hole": 1,
+    "Part::Box": 1,
+    "Part::Cylinder": 1,
+    "App::Origin": 1,  # not allowed, skipped by the scan
+}
+
+# field -> default of a DocumentSpec
+SPEC_FIELDS = {
+    "objects": 1000,
+    "mix": DEFAULT_MIX,  # TypeId -> weight
+    "properties": 3,  # allowed quantities per non-sketch object
+    "noise": 4,  # not allowed properties per object
+    "constraints": 12,  # per sketch
+    "nondatum": 0.5,  # share of geometric constraints
+    "driven": 0.1,  # share of the datum constraints that are Driven
+    "named": 0.3,  # share of the datum constraints with a name
+    "readonly": 0.05,  # share of the objects with a ReadOnly Placement
+    "body_size": 50,  # objects per Body
+    "seed": 0,
+}
+
+# allowed properties given to the objects, in this order
+QUANTITY_PROPERTIES = (
+    "Length", "Width", "Height", "Radius", "Angle", "Offset", "Depth",
+    "Diameter", "Length2", "TaperAngle", "Size", "Size2")
+
+# non-datum constraint types, getDatum raises on them
+GEOMETRIC_CONSTRAINTS = ("Coincident", "Horizontal", "Vertical", "Parallel",
+                         "Tangent", "Equal")
+DATUM_CONSTRAINTS = ("Distance", "DistanceX", "DistanceY", "Radius",
+                     "Diameter", "Angle")
+
+
+class DocumentSpec:
+    """What a synthetic document is made of, see SPEC_FIELDS"""
+
+    def __init__(self, **fields):
+        unknown = set(fields) - set(SPEC_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown spec field(s): {sorted(unknown)}")
+        for name, default in SPEC_FIELDS.items():
+            value = fields.get(name, default)
+            setattr(self, name, dict(value) if name == "mix" else value)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in SPEC_FIELDS}
+
+
+def make_constraints(rng, spec):
+    Constraints = []
+    for ii in range(spec.constraints):
+        if rng.random() < spec.nondatum:
+            Constraints.append(
+                FreeCAD.Constraint(rng.choice(GEOMETRIC_CONSTRAINTS)))
+            continue
+        Type = rng.choice(DATUM_CONSTRAINTS)
+        Name = f"Dim{ii}" if rng.random() < spec.named else ""
+        Value = rng.uniform(1.0, 200.0)
+        Constraints.append(FreeCAD.Constraint(
+            Type, Name, Value, Driving=rng.random() >= spec.driven))
+    return Constraints
+
+
+def make_document(spec, name="Synthetic"):
+    """Returns a new document of the fake FreeCAD built after spec"""
+    rng = random.Random(spec.seed)
+    doc = FreeCAD.newDocument(name)
+    types = list(spec.mix)
+    weights = [spec.mix[t] for t in types]
+    body = None
+    sketch = None
+    for ii in range(spec.objects):
+        if ii % spec.body_size == 0:
+            body = doc.addObject("PartDesign::Body", "Body")
+            continue
+        type_id = rng.choices(types, weights)[0]
+        obj = doc.addObject(type_id)
+        obj.parent = body
+        obj.Label = f"{obj.Name} {rng.choice(('left', 'right', 'top'))}"
+        if rng.random() < spec.readonly:
+            obj.set("Placement", obj.Placement, status=("ReadOnly",))
+        else:
+            obj.Placement = FreeCAD.Placement(
+                FreeCAD.Vector(rng.uniform(-50, 50), rng.uniform(-50, 50),
+                               rng.uniform(-50, 50)),
+                rng.uniform(0, 3.14))
+        for jj in range(spec.noise):
+            obj.set(f"Data{jj}", rng.randint(0, 9))
+
+        if type_id == "Sketcher::SketchObject":
+            obj.set("Constraints", make_constraints(rng, spec))
+            obj.set("AttachmentOffset", FreeCAD.Placement(
+                FreeCAD.Vector(0, 0, rng.uniform(0, 10))))
+            sketch = obj
+            continue
+        for Property in QUANTITY_PROPERTIES[:spec.properties]:
+            unit = "deg" if "Angle" in Property else "mm"
+            obj.set(Property, FreeCAD.Quantity(rng.uniform(1, 100), unit))
+        if sketch is not None and type_id.startswith("PartDesign::"):
+            obj.OutList.append(sketch)
+            sketch.InList.append(obj)
+    return doc